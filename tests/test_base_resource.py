@@ -0,0 +1,460 @@
+import json
+import time
+from os import path
+
+from botocore.stub import Stubber
+
+from tfcli.resources import BaseResource, Ec2, Vpc, base, builders, inventory
+from tfcli.resources.clients import CLIENT_POOL
+
+
+class Fake(BaseResource):
+    """fake resource counting how many times it is enumerated"""
+
+    calls = 0
+
+    def __init__(self, logger=None, indexes=None, **kwargs):
+        super().__init__(logger, **kwargs)
+        self.indexes = indexes
+
+    @classmethod
+    def ignore_attrbute(cls, key, value):
+        return False
+
+    @classmethod
+    def included_resource_types(cls):
+        return ["aws_fake"]
+
+    def list_all(self):
+        Fake.calls += 1
+        yield "aws_fake", "one", "id-1"
+        yield "aws_fake", "two", "id-2"
+
+
+def test_inventory_is_enumerated_once_per_run():
+    Fake.invalidate_inventory()
+    Fake.calls = 0
+    assert Fake().inventory() == Fake().inventory()
+    assert Fake.calls == 1
+    Fake(indexes=[0]).inventory()
+    assert Fake.calls == 2
+
+
+def test_inventory_invalidate():
+    Fake.invalidate_inventory()
+    Fake.calls = 0
+    res = Fake()
+    res.inventory()
+    res.inventory(refresh=True)
+    assert Fake.calls == 2
+    BaseResource.invalidate_inventory()
+    res.inventory()
+    assert Fake.calls == 3
+
+
+def test_paginate_yields_records_of_all_pages(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    res = Fake()
+    sqs = res.client("sqs")
+    with Stubber(sqs) as stub:
+        stub.add_response("list_queues", {"QueueUrls": ["q1"], "NextToken": "t"})
+        stub.add_response("list_queues", {"QueueUrls": ["q2"]}, {"NextToken": "t"})
+        assert list(res.paginate(sqs, "list_queues", "QueueUrls")) == ["q1", "q2"]
+
+
+def test_paginate_not_paginated_api(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    res = Fake()
+    ec2 = res.client("ec2")
+    with Stubber(ec2) as stub:
+        stub.add_response("describe_addresses", {"Addresses": []})
+        assert list(res.paginate(ec2, "describe_addresses", "Addresses")) == []
+
+
+def test_fan_out_keeps_order():
+    res = Fake(max_workers=4)
+
+    def slow_square(x):
+        time.sleep(0.01 * (10 - x))
+        return x * x
+
+    assert list(res.fan_out(slow_square, range(10))) == [x * x for x in range(10)]
+    assert list(res.fan_out(slow_square, range(3), max_workers=1)) == [0, 1, 4]
+
+
+def test_clients_are_shared():
+    one, another = Fake(region="us-east-1"), Fake(region="us-east-1")
+    assert one.session is another.session
+    assert one.client("ec2") is another.client("ec2")
+    assert one.client("ec2") is not Fake(region="us-west-2").client("ec2")
+
+
+def test_api_filters():
+    Fake.supported_filters = ("tag:", "vpc-id")
+    try:
+        res = Fake(filters={"tag:Env": ["prod"], "vpc-id": ["vpc-1"], "cidr": ["x"]})
+        assert res.api_filters(state=["available"]) == [
+            dict(Name="state", Values=["available"]),
+            dict(Name="tag:Env", Values=["prod"]),
+            dict(Name="vpc-id", Values=["vpc-1"]),
+        ]
+    finally:
+        Fake.supported_filters = ()
+    assert Fake(filters={"vpc-id": ["vpc-1"]}).api_filters() == []
+
+
+def test_inventory_snapshot(monkeypatch, tmp_path):
+    monkeypatch.setattr(inventory, "INVENTORY_DIR", str(tmp_path))
+    monkeypatch.setattr(CLIENT_POOL, "account_id", lambda *args: "123456789012")
+    Fake.invalidate_inventory()
+    Fake.calls = 0
+    res = Fake(region="us-east-1", snapshot_ttl=60)
+    items = res.inventory()
+    assert Fake.calls == 1
+    # a new run reuses snapshot instead of enumerating from AWS
+    Fake.invalidate_inventory()
+    assert Fake(region="us-east-1", snapshot_ttl=60).inventory() == items
+    assert Fake.calls == 1
+    Fake(region="us-east-1", snapshot_ttl=60).inventory(refresh=True)
+    assert Fake.calls == 2
+    (one,) = inventory.list_snapshots()
+    assert (one["account"], one["region"], one["resource"]) == (
+        "123456789012",
+        "us-east-1",
+        "Fake",
+    )
+    assert one["items"] == items
+
+
+class Listed(Fake):
+    """fake resource listing whatever in `items`"""
+
+    items = []
+
+    def list_all(self):
+        yield from self.items
+
+
+def _state(*names):
+    return dict(
+        version=4,
+        serial=1,
+        lineage="test",
+        resources=[
+            dict(
+                type="aws_fake",
+                name=_,
+                instances=[dict(attributes=dict(id=_, size=len(_)))],
+            )
+            for _ in names
+        ],
+    )
+
+
+def test_incremental_sync(monkeypatch, tmp_path):
+    commands = []
+    monkeypatch.setattr(
+        base, "run_cmd", lambda cmd, *args, **kwargs: commands.append(cmd) or 0
+    )
+    root = str(tmp_path)
+    with open(path.join(root, "terraform.tfstate"), "wt") as fd:
+        json.dump(_state("one", "two"), fd)
+    Listed.invalidate_inventory()
+    Listed.items = [("aws_fake", "one", "id-1"), ("aws_fake", "two", "id-2")]
+    Listed().sync_tfstate(root)
+    assert len(commands) == 1  # terraform fmt
+    # `size` is not ignored by Fake, nothing is touched
+    with open(path.join(root, ".tfcli", "Listed.manifest.json"), "rt") as fd:
+        assert not any(_["touched"] for _ in json.load(fd).values())
+
+    # `two` is removed from AWS, and `three` is created
+    Listed.invalidate_inventory()
+    Listed.items = [("aws_fake", "one", "id-1"), ("aws_fake", "three", "id-3")]
+    commands.clear()
+    Listed().load_tfstate(root, incremental=True)
+    assert [_[-2:] for _ in commands if _[1] == "import"] == [
+        ["aws_fake.three", "id-3"]
+    ]
+    with open(path.join(root, "terraform.tfstate"), "rt") as fd:
+        assert [_["name"] for _ in json.load(fd)["resources"]] == ["one"]
+
+    with open(path.join(root, "terraform.tfstate"), "wt") as fd:
+        json.dump(_state("one", "three"), fd)
+    commands.clear()
+    Listed().sync_tfstate(root, incremental=True)
+    with open(path.join(root, "main.tf"), "rt") as fd:
+        text = fd.read()
+    assert 'resource "aws_fake" "three"' in text and '"two"' not in text
+    assert len(commands) == 1
+    # nothing changed since previous sync
+    commands.clear()
+    Listed().sync_tfstate(root, incremental=True)
+    assert commands == []
+
+
+def test_import_sharded(monkeypatch, tmp_path):
+    def fake_import(cmd, logger, cwd, *args, **kwargs):
+        if cmd[1] != "import":
+            return 0
+        if cmd[-1] == "id-bad":
+            return 1
+        state_file = cmd[3][len("-state-out=") :]
+        assert path.dirname(state_file) == cwd != root
+        with open(state_file, "rt") as fd:
+            data = json.load(fd)
+        _type, name = cmd[-2].split(".")
+        data["resources"].append(
+            dict(type=_type, name=name, instances=[dict(attributes=dict(id=name))])
+        )
+        with open(state_file, "wt") as fd:
+            json.dump(data, fd)
+        return 0
+
+    monkeypatch.setattr(base, "run_cmd", fake_import)
+    root = str(tmp_path)
+    with open(path.join(root, "terraform.tfstate"), "wt") as fd:
+        json.dump(_state("one"), fd)
+    Listed.invalidate_inventory()
+    Listed.items = [("aws_fake", _, "id-" + _) for _ in ["one", "a", "b", "c", "bad"]]
+    failed = Listed().load_tfstate(root, import_workers=2)
+    assert len(failed) == 1 and failed[0].endswith("aws_fake.bad id-bad")
+    with open(path.join(root, "terraform.tfstate"), "rt") as fd:
+        data = json.load(fd)
+    assert sorted(_["name"] for _ in data["resources"]) == ["a", "b", "c", "one"]
+    assert data["lineage"] == "test" and data["serial"] == 2
+    assert not path.exists(path.join(root, ".tfcli", "shards", "Listed"))
+
+
+def test_synthesize_state(monkeypatch, tmp_path):
+    commands = []
+    monkeypatch.setattr(
+        base, "run_cmd", lambda cmd, *args, **kwargs: commands.append(cmd) or 0
+    )
+    monkeypatch.setitem(
+        builders.STATE_BUILDERS,
+        "aws_fake",
+        (lambda res, name, _id: None if _id == "id-b" else dict(id=_id), 0),
+    )
+    root = str(tmp_path)
+    Listed.invalidate_inventory()
+    Listed.items = [("aws_fake", "a", "id-a"), ("aws_fake", "b", "id-b")]
+    Listed(synthesize_state=True).load_tfstate(root)
+    # `b` can not be built, so it is imported
+    assert [_[-2:] for _ in commands if _[1] == "import"] == [["aws_fake.b", "id-b"]]
+    with open(path.join(root, "terraform.tfstate"), "rt") as fd:
+        (one,) = json.load(fd)["resources"]
+    assert one["name"] == "a"
+    assert one["instances"][0]["attributes"] == dict(id="id-a")
+
+
+def test_build_eip_state():
+    res = Fake(synthesize_state=True)
+    res.record(
+        "describe_addresses",
+        dict(
+            AllocationId="eipalloc-1",
+            Domain="vpc",
+            PublicIp="1.2.3.4",
+            Tags=[dict(Key="Name", Value="web")],
+        ),
+    )
+    one = builders.build_state(res, "aws_eip", "eipalloc-1", "eipalloc-1")
+    attributes = one["instances"][0]["attributes"]
+    assert (attributes["public_ip"], attributes["vpc"]) == ("1.2.3.4", True)
+    assert attributes["tags"] == dict(Name="web")
+    assert builders.build_state(res, "aws_eip", "eipalloc-2", "eipalloc-2") is None
+
+
+def test_shared_init(monkeypatch, tmp_path):
+    commands = []
+    monkeypatch.setattr(
+        base, "run_cmd", lambda cmd, *args, **kwargs: commands.append(cmd) or 0
+    )
+    init_dir = str(tmp_path / "init")
+    assert base.init_providers(init_dir, None) == 0
+    assert commands == [["terraform", "init", "-input=false"]]
+    with open(path.join(init_dir, "main.tf"), "rt") as fd:
+        assert 'provider "aws"' in fd.read()
+    (tmp_path / "init" / ".terraform").mkdir()
+
+    root = str(tmp_path / "fake")
+    (tmp_path / "fake").mkdir()
+    Listed.invalidate_inventory()
+    Listed.items = [("aws_fake", "one", "id-1")]
+    commands.clear()
+    Listed().load_tfstate(root, init_dir=init_dir)
+    assert [_[1] for _ in commands] == ["import"]
+    assert path.islink(path.join(root, ".terraform"))
+
+
+def test_import_retries(monkeypatch, tmp_path):
+    attempts = dict()
+
+    def flaky_import(cmd, logger, cwd, errors=None, **kwargs):
+        if cmd[1] != "import":
+            return 0
+        attempts[cmd[-1]] = attempts.get(cmd[-1], 0) + 1
+        if cmd[-1] == "id-slow" and attempts[cmd[-1]] < 3:
+            errors.append("Error: ThrottlingException: Rate exceeded")
+            return 1
+        if cmd[-1] == "id-gone":
+            errors.append("Error: Cannot import non-existent remote object")
+            return 1
+        return 0
+
+    monkeypatch.setattr(base, "run_cmd", flaky_import)
+    monkeypatch.setattr(base, "backoff_delay", lambda attempt: 0)
+    root = str(tmp_path)
+    Listed.invalidate_inventory()
+    Listed.items = [("aws_fake", _, "id-" + _) for _ in ["ok", "slow", "gone"]]
+    failed = Listed().load_tfstate(root, import_retries=3)
+    assert attempts == {"id-ok": 1, "id-slow": 3, "id-gone": 1}
+    assert len(failed) == 1 and failed[0].endswith("id-gone")
+    with open(path.join(root, ".tfcli", "Listed.failures.json"), "rt") as fd:
+        (one,) = json.load(fd)
+    assert (one["address"], one["kind"], one["transient"]) == (
+        "aws_fake.gone",
+        "not_found",
+        False,
+    )
+
+
+def test_sync_marks_touched_resources(monkeypatch, tmp_path):
+    class Ignoring(Listed):
+        @classmethod
+        def ignore_attrbute(cls, key, value):
+            return key in ["id", "size"]
+
+    monkeypatch.setattr(base, "run_cmd", lambda *args, **kwargs: 0)
+    root = str(tmp_path)
+    with open(path.join(root, "terraform.tfstate"), "wt") as fd:
+        json.dump(_state("one"), fd)
+    Ignoring.invalidate_inventory()
+    Ignoring.items = [("aws_fake", "one", "id-1")]
+    Ignoring().sync_tfstate(root)
+    with open(path.join(root, ".tfcli", "Ignoring.manifest.json"), "rt") as fd:
+        assert json.load(fd)["aws_fake.one"]["touched"]
+
+
+def test_build_role_state(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    res = Fake(synthesize_state=True)
+    detail = dict(
+        RoleName="app",
+        RoleId="AROAEXAMPLEEXAMPLE",
+        Arn="arn:aws:iam::123456789012:role/app",
+        Path="/",
+        CreateDate="2020-01-01T00:00:00Z",
+        AssumeRolePolicyDocument=dict(Version="2012-10-17", Statement=[]),
+    )
+    res.record("get_account_authorization_details", detail)
+    role = dict(
+        detail,
+        Description="app role",
+        MaxSessionDuration=7200,
+        AssumeRolePolicyDocument="{}",
+    )
+    with Stubber(res.client("iam")) as stub:
+        stub.add_response("get_role", dict(Role=role), dict(RoleName="app"))
+        one = builders.build_state(res, "aws_iam_role", "app", "app")
+    attributes = one["instances"][0]["attributes"]
+    assert attributes["description"] == "app role"
+    assert attributes["max_session_duration"] == 7200
+    assert attributes["unique_id"] == "AROAEXAMPLEEXAMPLE"
+    assert attributes["create_date"] == "2020-01-01T00:00:00Z"
+    assert one["provider"] == 'provider["registry.terraform.io/hashicorp/aws"]'
+
+
+def test_import_blocks_into_non_empty_state(monkeypatch, tmp_path):
+    root = str(tmp_path)
+    state_file = path.join(root, "terraform.tfstate")
+    with open(state_file, "wt") as fd:
+        json.dump(_state("old"), fd)
+    scratch_states = []
+
+    def import_with_blocks(cwd, pending, logger, generate_config=False):
+        scratch_file = path.join(cwd, "terraform.tfstate")
+        with open(scratch_file, "rt") as fd:
+            scratch_states.append(json.load(fd))
+        with open(scratch_file, "wt") as fd:
+            json.dump(_state(*[_id for _, _id in pending]), fd)
+        return True
+
+    monkeypatch.setattr(base, "import_with_blocks", import_with_blocks)
+    monkeypatch.setattr(base, "run_cmd", lambda cmd, *args, **kwargs: 0)
+    Listed.invalidate_inventory()
+    Listed.items = [("aws_fake", "old", "old"), ("aws_fake", "new", "new")]
+    failed = Listed().load_tfstate(root, import_blocks=True)
+    assert failed == []
+    # the existing resource is not in the scratch state to be planned to delete
+    assert [_["resources"] for _ in scratch_states] == [[]]
+    with open(state_file, "rt") as fd:
+        names = [_["name"] for _ in json.load(fd)["resources"]]
+    assert sorted(names) == ["new", "old"]
+
+
+def test_sync_does_not_touch_computed_attributes(monkeypatch, tmp_path):
+    class ListedVpc(Vpc):
+        def list_all(self):
+            yield "aws_vpc", "main", "vpc-1"
+
+    monkeypatch.setattr(base, "run_cmd", lambda *args, **kwargs: 0)
+    root = str(tmp_path)
+    attributes = dict(
+        id="vpc-1",
+        arn="arn:aws:ec2:us-east-1:123456789012:vpc/vpc-1",
+        owner_id="123456789012",
+        cidr_block="10.0.0.0/16",
+        default_network_acl_id="acl-1",
+        default_route_table_id="rtb-1",
+        default_security_group_id="sg-1",
+        main_route_table_id="rtb-1",
+        dhcp_options_id="dopt-1",
+    )
+    state = dict(
+        version=4,
+        resources=[
+            dict(type="aws_vpc", name="main", instances=[dict(attributes=attributes)])
+        ],
+    )
+    with open(path.join(root, "terraform.tfstate"), "wt") as fd:
+        json.dump(state, fd)
+    ListedVpc.invalidate_inventory()
+    ListedVpc().sync_tfstate(root)
+    with open(path.join(root, ".tfcli", "ListedVpc.manifest.json"), "rt") as fd:
+        assert not json.load(fd)["aws_vpc.main"]["touched"]
+    with open(path.join(root, "main.tf"), "rt") as fd:
+        text = fd.read()
+    assert "cidr_block" in text and "default_route_table_id" not in text
+
+
+def test_sync_touches_nested_amended_attributes(monkeypatch, tmp_path):
+    class ListedEc2(Ec2):
+        def list_all(self):
+            yield "aws_instance", "web", "i-1"
+
+    monkeypatch.setattr(base, "run_cmd", lambda *args, **kwargs: 0)
+    root = str(tmp_path)
+    attributes = dict(
+        id="i-1",
+        ami="ami-1",
+        instance_type="t3.micro",
+        ebs_block_device=[dict(device_name="/dev/sdb", volume_id="vol-1")],
+    )
+    state = dict(
+        version=4,
+        resources=[
+            dict(
+                type="aws_instance", name="web", instances=[dict(attributes=attributes)]
+            )
+        ],
+    )
+    with open(path.join(root, "terraform.tfstate"), "wt") as fd:
+        json.dump(state, fd)
+    ListedEc2.invalidate_inventory()
+    ListedEc2().sync_tfstate(root)
+    with open(path.join(root, ".tfcli", "ListedEc2.manifest.json"), "rt") as fd:
+        assert json.load(fd)["aws_instance.web"]["touched"]
+    with open(path.join(root, "main.tf"), "rt") as fd:
+        text = fd.read()
+    assert "/dev/sdb" in text and "vol-1" not in text
@@ -0,0 +1,96 @@
+from os import path
+
+import click
+import pytest
+
+from tfcli.cli import parse_rate_limits, sync_jobs, sync_resources
+from tfcli.resources.clients import CLIENT_POOL
+from tfcli.resources.journal import Journal
+
+from test_base_resource import Fake
+
+
+class Synced(Fake):
+    """fake resource which records the directories it is synced into"""
+
+    roots = []
+
+    def create_tfconfig(self, root, config_file="main.tf"):
+        Synced.roots.append((root, self.region, self.profile))
+
+    def load_tfstate(self, root, **kwargs):
+        return []
+
+    def sync_tfstate(self, root, incremental=False):
+        pass
+
+
+def test_sync_into_region_dirs(tmp_path):
+    Synced.roots = []
+    summary = sync_resources(
+        [Synced], str(tmp_path), region="us-west-2", region_dir=True
+    )
+    root = path.join(str(tmp_path), "us-west-2", "synced")
+    assert summary["error"] is None
+    assert summary["output"] == path.dirname(root)
+    assert Synced.roots == [(root, "us-west-2", None)]
+    assert [_["event"] for _ in Journal(root).events()] == ["done"]
+
+
+def test_sync_into_output_without_account_and_region(tmp_path):
+    Synced.roots = []
+    summary = sync_resources([Synced], str(tmp_path), region="us-west-2")
+    assert summary["error"] is None
+    assert Synced.roots == [(path.join(str(tmp_path), "synced"), "us-west-2", None)]
+
+
+def test_sync_global_types_once(tmp_path):
+    class GlobalSynced(Synced):
+        is_global = True
+
+    jobs = sync_jobs([Synced, GlobalSynced], ["us-west-2", "eu-west-1"])
+    assert jobs == [
+        ([Synced], dict(region="us-west-2", region_dir=True)),
+        ([Synced], dict(region="eu-west-1", region_dir=True)),
+        ([GlobalSynced], dict(region="us-west-2", global_dir=True)),
+    ]
+    assert sync_jobs([GlobalSynced], []) == [
+        ([GlobalSynced], dict(region=None, region_dir=False))
+    ]
+    Synced.roots = []
+    summary = sync_resources([GlobalSynced], str(tmp_path), **jobs[-1][1])
+    root = path.join(str(tmp_path), "global", "globalsynced")
+    assert summary["error"] is None
+    assert Synced.roots == [(root, "us-west-2", None)]
+
+
+def test_sync_into_account_and_region_dirs(tmp_path, monkeypatch):
+    config_file = tmp_path / "config"
+    config_file.write_text("[profile dev]\nregion = us-east-1\n")
+    monkeypatch.setenv("AWS_CONFIG_FILE", str(config_file))
+    monkeypatch.setattr(
+        CLIENT_POOL, "account_id", lambda profile=None, role_arn=None: "123456789012"
+    )
+    Synced.roots = []
+    output = str(tmp_path / "output")
+    summary = sync_resources(
+        [Synced],
+        output,
+        region="us-west-2",
+        profile="dev",
+        account_dir=True,
+        region_dir=True,
+    )
+    root = path.join(output, "123456789012", "us-west-2", "synced")
+    assert summary["error"] is None
+    assert summary["output"] == path.dirname(root)
+    assert (summary["types"], summary["resources"]) == (1, 2)
+    assert Synced.roots == [(root, "us-west-2", "dev")]
+    assert [_["event"] for _ in Journal(root).events()] == ["done"]
+
+
+def test_parse_rate_limits_rejects_non_positive_rates():
+    assert parse_rate_limits(None, None, ("10", "iam=2")) == (10, {"iam": 2})
+    for text in ("0", "iam=-1"):
+        with pytest.raises(click.BadParameter):
+            parse_rate_limits(None, None, (text,))
@@ -0,0 +1,68 @@
+import datetime
+from os import listdir
+
+import boto3
+from botocore.stub import Stubber
+
+from tfcli.resources import clients
+
+ROLE_ARN = "arn:aws:iam::123456789012:role/tfcli"
+
+
+def _assume_role_response(key_id):
+    return {
+        "Credentials": {
+            "AccessKeyId": key_id,
+            "SecretAccessKey": "secret-access-key",
+            "SessionToken": "session-token",
+            "Expiration": datetime.datetime.now(datetime.timezone.utc)
+            + datetime.timedelta(hours=1),
+        },
+        "AssumedRoleUser": {
+            "AssumedRoleId": "AROAEXAMPLE:tfcli",
+            "Arn": "arn:aws:sts::123456789012:assumed-role/tfcli/tfcli",
+        },
+    }
+
+
+def _source(monkeypatch, sts):
+    source = boto3.Session(
+        aws_access_key_id="AKIASOURCEEXAMPLE",
+        aws_secret_access_key="source-secret",
+        region_name="us-east-1",
+    )
+    # the fetcher creates its sts client from the source session
+    monkeypatch.setattr(source._session, "create_client", lambda *a, **kw: sts)
+    return source
+
+
+def test_assume_role_credentials_are_cached_on_disk(tmp_path, monkeypatch):
+    monkeypatch.setattr(clients, "STS_CACHE_DIR", str(tmp_path))
+    pool = clients.ClientPool()
+    sts = boto3.client(
+        "sts",
+        region_name="us-east-1",
+        aws_access_key_id="AKIASOURCEEXAMPLE",
+        aws_secret_access_key="source-secret",
+    )
+    with Stubber(sts) as stub:
+        stub.add_response(
+            "assume_role",
+            _assume_role_response("ASIAASSUMEDEXAMPLE"),
+            dict(RoleArn=ROLE_ARN, RoleSessionName="tfcli"),
+        )
+        session = pool._assume_role(_source(monkeypatch, sts), ROLE_ARN)
+        assert session.region_name == "us-east-1"
+        # credentials are fetched on first use
+        credentials = session.get_credentials()
+        assert credentials.method == "assume-role"
+        frozen = credentials.get_frozen_credentials()
+        assert frozen.access_key == "ASIAASSUMEDEXAMPLE"
+        stub.assert_no_pending_responses()
+    assert len(listdir(str(tmp_path))) == 1
+
+    # another process reuses the cached credentials without calling sts
+    with Stubber(sts):
+        session = clients.ClientPool()._assume_role(_source(monkeypatch, sts), ROLE_ARN)
+        frozen = session.get_credentials().get_frozen_credentials()
+        assert frozen.access_key == "ASIAASSUMEDEXAMPLE"
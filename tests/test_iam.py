@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import boto3
+from botocore.stub import Stubber
+
+from tfcli.resources import Group, Role
+from tfcli.resources.iam import IamCatalog
+
+AUTHORIZATION_DETAILS = {
+    "UserDetailList": [
+        {"UserName": "alice", "GroupList": ["admins"]},
+        {"UserName": "bob", "GroupList": ["admins", "dev"]},
+    ],
+    "GroupDetailList": [
+        {
+            "GroupName": "admins",
+            "GroupPolicyList": [{"PolicyName": "inline", "PolicyDocument": "{}"}],
+            "AttachedManagedPolicies": [
+                {"PolicyName": "local", "PolicyArn": "arn:aws:iam::1:policy/local"}
+            ],
+        }
+    ],
+    "RoleDetailList": [
+        {
+            "RoleName": "ecs.role",
+            "AttachedManagedPolicies": [
+                {"PolicyName": "managed", "PolicyArn": "arn:aws:iam::aws:policy/m"}
+            ],
+            "InstanceProfileList": [
+                {
+                    "InstanceProfileName": "ecs-profile",
+                    "InstanceProfileId": "AIPA0000000000000000",
+                    "Path": "/",
+                    "Arn": "arn:aws:iam::1:instance-profile/ecs-profile",
+                    "CreateDate": datetime(2020, 1, 1),
+                    "Roles": [],
+                }
+            ],
+        }
+    ],
+    "Policies": [{"PolicyName": "local", "Arn": "arn:aws:iam::1:policy/local"}],
+    "IsTruncated": False,
+}
+
+
+def test_iam_catalog(monkeypatch):
+    IamCatalog.invalidate()
+    iam = boto3.Session(region_name="us-east-1").client("iam")
+    stub = Stubber(iam)
+    stub.add_response("get_account_authorization_details", AUTHORIZATION_DETAILS)
+    stub.activate()
+    group, role = Group(), Role()
+    monkeypatch.setattr(group, "client", lambda service: iam)
+    monkeypatch.setattr(role, "client", lambda service: iam)
+
+    assert list(group.list_all()) == [
+        ("aws_iam_group", "admins", "admins"),
+        ("aws_iam_group_policy", "admins_inline", "admins:inline"),
+        (
+            "aws_iam_group_policy_attachment",
+            "admins-local",
+            "admins/arn:aws:iam::1:policy/local",
+        ),
+        ("aws_iam_policy", "local", "arn:aws:iam::1:policy/local"),
+    ]
+    # catalog is loaded only once for both groups and roles
+    assert list(role.list_all()) == [
+        ("aws_iam_role", "ecs-role", "ecs.role"),
+        (
+            "aws_iam_role_policy_attachment",
+            "ecs-role-managed",
+            "ecs-role/arn:aws:iam::aws:policy/m",
+        ),
+        ("aws_iam_instance_profile", "ecs-profile", "ecs-profile"),
+    ]
+    attrs = group.amend_attributes("aws_iam_group_membership", "admins", dict())
+    assert attrs["users"] == ["alice", "bob"]
+    stub.assert_no_pending_responses()
@@ -0,0 +1,40 @@
+import logging
+
+from tfcli import imports
+
+
+def test_render_import_blocks():
+    text = imports.render_import_blocks([("aws_sqs_queue.q1", "https://q/1")])
+    assert text == 'import {\n  to = aws_sqs_queue.q1\n  id = "https://q/1"\n}\n\n'
+
+
+def test_unexpected_changes():
+    plan = dict(
+        resource_changes=[
+            dict(address="aws_eip.a", change=dict(actions=["no-op"], importing={})),
+            dict(address="aws_eip.b", change=dict(actions=["update"], importing={})),
+        ]
+    )
+    assert imports.unexpected_changes(plan) == ["aws_eip.b"]
+
+
+def test_import_with_blocks_needs_new_terraform(monkeypatch, tmp_path):
+    monkeypatch.setattr(imports, "terraform_version", lambda: (1, 4, 6))
+    monkeypatch.setattr(imports, "run_cmd", lambda *args, **kwargs: 0)
+    logger = logging.getLogger(__name__)
+    assert not imports.import_with_blocks(str(tmp_path), [("aws_eip.a", "a")], logger)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_classify_failure():
+    assert imports.classify_failure(
+        "Error: error reading SQS Queue: Throttling: Rate exceeded"
+    ) == ("throttling", True)
+    assert imports.classify_failure("Error: Error acquiring the state lock") == (
+        "state_lock",
+        True,
+    )
+    assert imports.classify_failure(
+        "Error: Cannot import non-existent remote object"
+    ) == ("not_found", False)
+    assert imports.classify_failure("something else") == ("unknown", False)
@@ -0,0 +1,43 @@
+import json
+from os import path
+
+from tfcli.resources import base
+from tfcli.resources.journal import Journal, list_journals
+
+from test_base_resource import Listed, _state
+
+
+def test_journal_status(tmp_path):
+    journal = Journal(str(tmp_path))
+    journal.append("start", resource="Vpc", addresses=["aws_vpc.a", "aws_vpc.b"])
+    journal.append("import", resource="Vpc", address="aws_vpc.a", ok=True)
+    journal.append("import", resource="Vpc", address="aws_vpc.b", ok=False)
+    with open(journal.path, "at") as fd:
+        fd.write('{"event": "imp')  # torn by a killed run
+    run = journal.status()["Vpc"]
+    assert (run["total"], run["ok"], run["failed"], run["pending"]) == (2, 1, 1, 0)
+    assert not journal.is_done("Vpc")
+    assert [_[0] for _ in list_journals(str(tmp_path))] == [str(tmp_path)]
+
+
+def test_load_tfstate_journal_and_leftover_shards(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        base, "run_cmd", lambda cmd, *args, **kwargs: 1 if cmd[-1] == "id-b" else 0
+    )
+    root = str(tmp_path)
+    with open(path.join(root, "terraform.tfstate"), "wt") as fd:
+        json.dump(_state("one"), fd)
+    # a previous run was killed before merging its shard
+    shard_dir = tmp_path / ".tfcli" / "shards" / "Listed" / "0"
+    shard_dir.mkdir(parents=True)
+    (shard_dir / "terraform.tfstate").write_text(json.dumps(_state("a")))
+
+    Listed.invalidate_inventory()
+    Listed.items = [("aws_fake", _, "id-" + _) for _ in ["one", "a", "b"]]
+    Listed().load_tfstate(root)
+    run = Journal(root).status()["Listed"]
+    # only `b` is imported again
+    assert (run["total"], run["ok"], run["failed"]) == (1, 0, 1)
+    with open(path.join(root, "terraform.tfstate"), "rt") as fd:
+        assert [_["name"] for _ in json.load(fd)["resources"]] == ["one", "a"]
+    assert not shard_dir.exists()
@@ -0,0 +1,51 @@
+from collections import namedtuple
+
+from tfcli.resources.ratelimit import RateLimiter, TokenBucket
+
+HttpResponse = namedtuple("HttpResponse", "status_code")
+
+
+def test_token_bucket_backs_off_and_ramps_up():
+    bucket = TokenBucket(8, ramp_up=1)
+    bucket.on_throttled()
+    bucket.on_throttled()
+    assert bucket.rate == 2
+    for _ in range(10):
+        bucket.on_succeeded()
+    assert bucket.rate == 8
+    assert bucket.stats()["throttled"] == 2
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(100)
+    for _ in range(150):
+        bucket.acquire()
+    stats = bucket.stats()
+    assert stats["calls"] == 150
+    assert stats["waited"] > 0.3
+
+
+def test_rate_limiter_counts_throttles():
+    limiter = RateLimiter(rate=10, limits={"iam": 4, "ec2.DescribeVpcs": 2})
+    event = "needs-retry.iam.ListRoles"
+    throttled = (HttpResponse(400), {"Error": {"Code": "Throttling"}})
+    limiter._before_send("iam", "before-send.iam.ListRoles")
+    limiter._needs_retry("iam", event, response=throttled)
+    limiter._needs_retry("iam", event, response=(HttpResponse(200), {}))
+    stats = limiter.stats()
+    assert stats["iam.ListRoles"]["calls"] == 1
+    assert stats["iam.ListRoles"]["throttled"] == 1
+    assert stats["iam.ListRoles"]["rate"] == 2.1
+    assert limiter.bucket("ec2", "DescribeVpcs").max_rate == 2
+    assert limiter.bucket("ec2", "DescribeSubnets").max_rate == 10
+
+
+def test_token_bucket_acquires_below_one_request_per_second():
+    bucket = TokenBucket(20, min_rate=0.5)
+    for _ in range(6):
+        bucket.on_throttled()
+    assert bucket.rate == 0.5
+    bucket.tokens = 0.9
+    bucket.acquire()
+    assert bucket.stats()["calls"] == 1
+    assert bucket.stats()["waited"] <= 0.3
@@ -1,5 +1,6 @@
 import shutil
 import tempfile
+from os import environ
 
 import pytest
 
@@ -13,6 +14,7 @@ from tfcli.resources import (
     Eip,
     Elb,
     Iamg,
+    Role,
     InstanceProfile,
     Igw,
     Vpc,
@@ -132,3 +134,42 @@ def test_load_tfstate_instance_profile(test_root):
 
 def test_load_tfstate_emr(test_root):
     _test_load_and_validate(Emr(), test_root)
+
+
+# synthesized state should plan no diff just like imported one, these sync real
+# resources and run terraform, so they are opt in by TFCLI_TEST_SYNTHESIZE=1
+synthesize = pytest.mark.skipif(
+    not environ.get("TFCLI_TEST_SYNTHESIZE"), reason="TFCLI_TEST_SYNTHESIZE is not set"
+)
+
+
+@synthesize
+def test_synthesize_tfstate_eip(test_root):
+    _test_load_and_validate(
+        Eip(indexes=list(range(5)), synthesize_state=True), test_root
+    )
+
+
+@synthesize
+def test_synthesize_tfstate_cwa(test_root):
+    # TODO: `+ treat_missing_data        = "missing"`
+    _test_load_and_validate(Cwa(synthesize_state=True), test_root, should_no_diff=False)
+
+
+@synthesize
+def test_synthesize_tfstate_role(test_root):
+    _test_load_and_validate(Role(synthesize_state=True), test_root)
+
+
+@synthesize
+def test_synthesize_tfstate_sqs(test_root):
+    _test_load_and_validate(
+        Sqs(indexes=list(range(3)), synthesize_state=True), test_root
+    )
+
+
+@synthesize
+def test_synthesize_tfstate_sns(test_root):
+    _test_load_and_validate(
+        Sns(indexes=list(range(3)), synthesize_state=True), test_root
+    )
@@ -0,0 +1,70 @@
+import sys
+import time
+
+from tfcli import runner
+from tfcli.util import run_cmd
+
+
+def test_run_keeps_last_lines():
+    code = "import sys\nfor i in range(5): print(i)\nsys.stderr.write('oops')"
+    result = runner.run([sys.executable, "-c", code], max_lines=2)
+    assert result.returncode == 0 and not result.timed_out
+    assert result.stdout == ["3", "4"] and result.stderr == ["oops"]
+
+
+def test_run_kills_process_group_on_timeout():
+    started = time.time()
+    result = runner.run(["sh", "-c", "sleep 30 & sleep 30"], timeout=0.5)
+    assert result.timed_out and result.returncode != 0
+    assert result.stderr[-1].startswith("timed out")
+    assert time.time() - started < 10
+
+
+def test_run_all_keeps_order():
+    commands = [
+        (
+            [
+                sys.executable,
+                "-c",
+                "import time; time.sleep({}); print({})".format(t, i),
+            ],
+            None,
+        )
+        for i, t in enumerate([0.3, 0.1, 0.2])
+    ]
+    results = runner.run_all(commands, concurrency=2)
+    assert [_.stdout for _ in results] == [["0"], ["1"], ["2"]]
+
+
+def test_run_cmd_collects_errors():
+    errors = []
+    code = "import sys; sys.stderr.write('Throttling'); sys.exit(3)"
+    assert run_cmd([sys.executable, "-c", code], errors=errors) == 3
+    assert errors == ["Throttling"]
+
+
+def test_run_all_writes_stdout_to_file(tmp_path):
+    code = "import sys; sys.stdout.write('x' * 1000000); sys.stderr.write('done')"
+    (result,) = runner.run_all(
+        [([sys.executable, "-c", code], str(tmp_path))], stdout_file="out.txt"
+    )
+    assert result.returncode == 0
+    assert result.stdout == [] and result.stderr == ["done"]
+    assert (tmp_path / "out.txt").read_text() == "x" * 1000000
+
+
+def test_run_all_reads_long_lines():
+    code = "print('x' * 200000); print('done', end='')"
+    (result,) = runner.run_all([([sys.executable, "-c", code], None)])
+    assert result.returncode == 0
+    assert result.stdout == ["x" * 200000, "done"]
+
+
+def test_run_all_fails_one_command_only(tmp_path):
+    commands = [
+        ([str(tmp_path / "missing")], None),
+        ([sys.executable, "-c", "print('ok')"], None),
+    ]
+    failed, succeeded = runner.run_all(commands)
+    assert failed.returncode == -1 and failed.stderr and not failed.timed_out
+    assert succeeded.returncode == 0 and succeeded.stdout == ["ok"]
@@ -0,0 +1,337 @@
+import io
+import json
+
+import pytest
+
+from tfcli import state
+
+
+def _v4(*resources):
+    return dict(
+        version=4,
+        terraform_version="1.5.7",
+        serial=3,
+        lineage="lineage",
+        outputs=dict(resources=dict(value="not a resource")),
+        resources=list(resources),
+    )
+
+
+def _res(_type, name, module=None, **attributes):
+    res = dict(
+        mode="managed",
+        type=_type,
+        name=name,
+        provider="provider.aws",
+        instances=[dict(schema_version=0, attributes=attributes)],
+    )
+    if module:
+        res["module"] = module
+    return res
+
+
+def test_json_reader_by_small_chunks():
+    text = '{"a": [1, 22, {"b": "\\u00e9\\"]"}], "c": 333}'
+    reader = state.JsonReader(io.StringIO(text), chunk_size=3)
+    keys = []
+    for key in reader.members():
+        keys.append(key)
+        if key == "a":
+            values = [reader.value() for _ in reader.items()]
+        else:
+            assert reader.value()[2] == 333
+    assert keys == ["a", "c"]
+    assert [_[2] for _ in values] == [1, 22, {"b": 'é"]'}]
+    start, end, _ = values[2]
+    assert text[start:end] == '{"b": "\\u00e9\\"]"}'
+
+
+def test_index_and_extract_v4(tmp_path):
+    state_file = str(tmp_path / "terraform.tfstate")
+    resources = [
+        _res("aws_vpc", "main", id="vpc-1", tags=dict(Name="ü" * 100)),
+        _res("aws_eip", "a", module="module.net", id="eip-1"),
+        _res("aws_vpc", "other", module="module.net", id="vpc-2"),
+    ]
+    with open(state_file, "wt", encoding="utf8") as fd:
+        json.dump(_v4(*resources), fd, indent=2, ensure_ascii=False)
+    index = state.load_index(state_file)
+    assert [_["address"] for _ in index["resources"]] == [
+        "aws_vpc.main",
+        "module.net.aws_eip.a",
+        "module.net.aws_vpc.other",
+    ]
+    assert state.load_index(state_file) == index  # reused
+
+    out_file = str(tmp_path / "vpc.tfstate")
+    entries = [_ for _ in index["resources"] if _["type"] == "aws_vpc"]
+    state.extract_resources(state_file, index, entries, out_file)
+    with open(out_file, "rt", encoding="utf8") as fd:
+        extracted = json.load(fd)
+    assert extracted["resources"] == [resources[0], resources[2]]
+    assert (extracted["serial"], extracted["lineage"]) == (3, "lineage")
+
+
+def test_index_and_extract_v3(tmp_path):
+    state_file = str(tmp_path / "terraform.tfstate")
+    data = dict(
+        version=3,
+        terraform_version="0.11.14",
+        serial=9,
+        lineage="old",
+        modules=[
+            dict(
+                path=["root"],
+                outputs=dict(),
+                resources={
+                    "aws_vpc.main": dict(type="aws_vpc"),
+                    "aws_eip.a.0": dict(type="aws_eip"),
+                    "data.aws_vpc.x": dict(type="aws_vpc"),
+                },
+                depends_on=[],
+            ),
+            dict(
+                outputs=dict(),
+                resources={"aws_vpc.b": dict(type="aws_vpc")},
+                path=["root", "net"],
+                depends_on=[],
+            ),
+        ],
+    )
+    with open(state_file, "wt") as fd:
+        json.dump(data, fd)
+    index = state.load_index(state_file)
+    assert [(_["address"], _["type"], _["mode"]) for _ in index["resources"]] == [
+        ("aws_vpc.main", "aws_vpc", "managed"),
+        ("aws_eip.a.0", "aws_eip", "managed"),
+        ("data.aws_vpc.x", "aws_vpc", "data"),
+        ("module.net.aws_vpc.b", "aws_vpc", "managed"),
+    ]
+    out_file = str(tmp_path / "eip.tfstate")
+    entries = [_ for _ in index["resources"] if _["type"] == "aws_eip"]
+    state.extract_resources(state_file, index, entries, out_file)
+    with open(out_file, "rt") as fd:
+        extracted = json.load(fd)
+    assert extracted["modules"] == [
+        dict(
+            path=["root"],
+            outputs=dict(),
+            resources={"aws_eip.a.0": dict(type="aws_eip")},
+            depends_on=[],
+        )
+    ]
+
+
+def test_split_v4_in_one_pass(tmp_path):
+    state_file = str(tmp_path / "terraform.tfstate")
+    resources = [
+        _res("aws_vpc", "main", id="vpc-1", tags=dict(Name="ü" * 100)),
+        _res("aws_iam_role", "r", id="role"),
+        _res("aws_subnet", "a", module="module.net", id="subnet-1"),
+    ]
+    with open(state_file, "wt", encoding="utf8") as fd:
+        json.dump(_v4(*resources), fd, ensure_ascii=False)
+    network, vpc, empty = [str(tmp_path / _) for _ in ["n", "v", "e"]]
+    counts = state.split_state(
+        state_file,
+        {network: ["aws_vpc", "aws_subnet"], vpc: ["AWS_VPC"], empty: ["aws_eip"]},
+        chunk_size=16,
+    )
+    assert counts == {network: 2, vpc: 1, empty: 0}
+    with open(network, "rt", encoding="utf8") as fd:
+        split = json.load(fd)
+    assert split["resources"] == [resources[0], resources[2]]
+    assert (split["version"], split["serial"], split["lineage"]) == (4, 3, "lineage")
+    with open(vpc, "rt", encoding="utf8") as fd:
+        assert json.load(fd)["resources"] == [resources[0]]
+    assert not (tmp_path / "e").exists()
+
+
+def test_split_v3_in_one_pass(tmp_path):
+    state_file = str(tmp_path / "terraform.tfstate")
+    data = dict(
+        modules=[
+            dict(
+                resources={
+                    "aws_vpc.main": dict(type="aws_vpc"),
+                    "aws_eip.a": dict(type="aws_eip"),
+                },
+                path=["root"],
+            ),
+            dict(path=["root", "ü"], resources={"aws_vpc.b": dict(type="aws_vpc")}),
+            dict(path=["root", "x"], resources={"aws_eip.b": dict(type="aws_eip")}),
+        ],
+        version=3,
+        serial=9,
+        lineage="old",
+    )
+    with open(state_file, "wt", encoding="utf8") as fd:
+        json.dump(data, fd, ensure_ascii=False)
+    out_file = str(tmp_path / "vpc.tfstate")
+    assert state.split_state(state_file, {out_file: ["aws_vpc"]}) == {out_file: 2}
+    with open(out_file, "rt", encoding="utf8") as fd:
+        split = json.load(fd)
+    assert [(_["path"], _["resources"]) for _ in split["modules"]] == [
+        (["root"], {"aws_vpc.main": dict(type="aws_vpc")}),
+        (["root", "ü"], {"aws_vpc.b": dict(type="aws_vpc")}),
+    ]
+    assert (split["version"], split["serial"], split["lineage"]) == (3, 9, "old")
+
+
+def _write_states(tmp_path, *states):
+    state_files = []
+    for i, one in enumerate(states):
+        state_files.append(str(tmp_path / "{}.tfstate".format(i)))
+        with open(state_files[-1], "wt", encoding="utf8") as fd:
+            json.dump(one, fd, indent=2, ensure_ascii=False)
+    return state_files
+
+
+def test_merge_state_files(tmp_path):
+    vpc = _res("aws_vpc", "main", id="vpc-1", tags=dict(Name="ü"))
+    old_role, new_role = _res("aws_iam_role", "r", id="old"), _res(
+        "aws_iam_role", "r", id="new"
+    )
+    first, second = _v4(vpc, old_role), _v4(new_role)
+    second["serial"], second["terraform_version"] = 7, "1.10.0"
+    state_files = _write_states(tmp_path, first, second)
+    out_file = str(tmp_path / "merged.tfstate")
+
+    with pytest.raises(ValueError):
+        state.merge_state_files(state_files, out_file, workers=1)
+    for policy, role in [("first", old_role), ("last", new_role), ("newest", new_role)]:
+        count, conflicts = state.merge_state_files(state_files, out_file, policy, 2)
+        assert (count, conflicts) == (2, ["aws_iam_role.r"])
+        with open(out_file, "rt", encoding="utf8") as fd:
+            merged = json.load(fd)
+        assert sorted(merged["resources"], key=state.resource_address) == [role, vpc]
+        assert (merged["version"], merged["serial"]) == (4, 1)
+        assert merged["terraform_version"] == "1.10.0"
+        assert merged["lineage"] != "lineage"
+
+    # the newest one wins regardless of order
+    state_files.reverse()
+    state.merge_state_files(state_files, out_file, "newest", 1)
+    with open(out_file, "rt", encoding="utf8") as fd:
+        assert new_role in json.load(fd)["resources"]
+
+
+def test_diff_states(tmp_path):
+    vpc = _res("aws_vpc", "main", id="vpc-1", cidr_block="10.0.0.0/16")
+    subnets = _res("aws_subnet", "a", id="subnet-1")
+    subnets["instances"] = [
+        dict(index_key=0, attributes=dict(id="subnet-1", cidr_block="10.0.1.0/24")),
+        dict(index_key=1, attributes=dict(id="subnet-2")),
+    ]
+    same = _res("aws_eip", "same", id="eip-1")
+    before = _v4(vpc, subnets, same, _res("aws_iam_role", "gone"))
+
+    changed_vpc = _res("aws_vpc", "main", id="vpc-2", cidr_block="10.1.0.0/16")
+    changed_subnets = _res("aws_subnet", "a")
+    changed_subnets["instances"] = [
+        dict(index_key=0, attributes=dict(id="subnet-1", cidr_block="10.0.2.0/24")),
+        # same attributes of a different schema version are not a change
+        dict(index_key=1, schema_version=1, attributes=dict(id="subnet-2")),
+        dict(index_key=2, attributes=dict(id="subnet-3")),
+    ]
+    after = _v4(same, changed_vpc, changed_subnets, _res("aws_sqs_queue", "new"))
+    file_a, file_b = _write_states(tmp_path, before, after)
+
+    report = state.diff_states(file_a, file_b)
+    assert report["added"] == ["aws_sqs_queue.new", "aws_subnet.a[2]"]
+    assert report["removed"] == ["aws_iam_role.gone"]
+    assert report["changed"] == [
+        dict(
+            address="aws_vpc.main",
+            type="aws_vpc",
+            attributes=[
+                dict(name="cidr_block", before="10.0.0.0/16", after="10.1.0.0/16"),
+                dict(name="id", before="vpc-1", after="vpc-2"),
+            ],
+        ),
+        dict(
+            address="aws_subnet.a[0]",
+            type="aws_subnet",
+            attributes=[
+                dict(name="cidr_block", before="10.0.1.0/24", after="10.0.2.0/24")
+            ],
+        ),
+    ]
+
+    def ignore(_type, key, value):
+        return key in ["id", "cidr_block"] and _type == "aws_vpc"
+
+    report = state.diff_states(file_a, file_b, ignore)
+    assert [_["address"] for _ in report["changed"]] == ["aws_subnet.a[0]"]
+    assert state.diff_states(file_a, file_a) == dict(added=[], removed=[], changed=[])
+
+
+def test_write_state_atomically_unless_unchanged(tmp_path):
+    state_file = str(tmp_path / "terraform.tfstate")
+    data = _v4(_res("aws_vpc", "main", id="vpc-1"))
+    assert state.write_state(state_file, data)
+    with open(state_file, "rt") as fd:
+        assert fd.read() == json.dumps(data, indent=2)
+    assert not state.write_state(state_file, data)
+
+    assert state.write_state(state_file, data, compact=True)
+    with open(state_file, "rt") as fd:
+        text = fd.read()
+    assert "\n" not in text and json.loads(text) == data
+    state.configure(compact=True)
+    try:
+        assert not state.write_state(state_file, data)
+    finally:
+        state.configure(compact=False)
+
+    # a failed write leaves the state as it was, and no temp file
+    with pytest.raises(TypeError):
+        state.write_state(state_file, dict(data, serial=object()))
+    with open(state_file, "rt") as fd:
+        assert fd.read() == text
+    with pytest.raises(RuntimeError):
+        with state.atomic_write(state_file) as fd:
+            fd.write("{")
+            raise RuntimeError("killed")
+    with open(state_file, "rt") as fd:
+        assert fd.read() == text
+    assert sorted(_.name for _ in tmp_path.iterdir()) == ["terraform.tfstate"]
+
+
+def test_crlf_state(tmp_path):
+    resources = [
+        _res("aws_vpc", "main", id="vpc-1", tags=dict(Name="ü")),
+        _res("aws_iam_role", "r", id="role", policy="a\r\nb"),
+    ]
+    state_file = str(tmp_path / "terraform.tfstate")
+    with open(state_file, "wb") as fd:
+        text = json.dumps(_v4(*resources), indent=2, ensure_ascii=False)
+        fd.write(text.replace("\n", "\r\n").encode("utf8"))
+
+    def load(out_file):
+        with open(out_file, "rt", encoding="utf8") as fd:
+            return json.load(fd)
+
+    index = state.load_index(state_file)
+    out_file = str(tmp_path / "vpc.tfstate")
+    state.extract_resources(state_file, index, index["resources"][:1], out_file)
+    assert load(out_file)["resources"] == resources[:1]
+
+    role_file = str(tmp_path / "role.tfstate")
+    state.split_state(state_file, {role_file: ["aws_iam_role"]})
+    assert load(role_file)["resources"] == resources[1:]
+
+    merged_file = str(tmp_path / "merged.tfstate")
+    state.merge_state_files([out_file, role_file], merged_file, workers=1)
+    assert load(merged_file)["resources"] == resources
+
+    changed = _v4(resources[0], _res("aws_iam_role", "r", id="role", policy="c"))
+    (other_file,) = _write_states(tmp_path, changed)
+    report = state.diff_states(state_file, other_file)
+    assert report["changed"] == [
+        dict(
+            address="aws_iam_role.r",
+            type="aws_iam_role",
+            attributes=[dict(name="policy", before="a\r\nb", after="c")],
+        )
+    ]
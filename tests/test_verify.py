@@ -0,0 +1,143 @@
+import io
+import json
+import os
+import sys
+
+from tfcli import verify
+from tfcli.resources.manifest import save_manifest
+from tfcli.state import iter_json_array
+
+
+def test_iter_json_array_by_small_chunks():
+    doc = dict(
+        format_version="1.0",
+        planned_values=dict(note='"resource_changes": [1]'),
+        resource_changes=[dict(address="aws_vpc.a", n=1.5), [1, 2], 12345, "x"],
+        after="ignored",
+    )
+    text = json.dumps(doc, indent=2)
+    items = list(iter_json_array(io.StringIO(text), "resource_changes", chunk_size=7))
+    assert items == doc["resource_changes"]
+    assert list(iter_json_array(io.StringIO(text), "missing", chunk_size=7)) == []
+
+
+def test_drift_of():
+    change = dict(
+        address="aws_sqs_queue.q",
+        type="aws_sqs_queue",
+        change=dict(
+            actions=["update"],
+            before=dict(name="q", delay_seconds=0, tags={}),
+            after=dict(name="q", delay_seconds=5, tags={}),
+            after_unknown=dict(arn=True),
+        ),
+    )
+    assert verify.drift_of(change) == dict(
+        address="aws_sqs_queue.q",
+        type="aws_sqs_queue",
+        action="update",
+        attributes=["arn", "delay_seconds"],
+    )
+    change["change"]["actions"] = ["delete", "create"]
+    assert verify.drift_of(change)["action"] == "replace"
+    change["change"]["actions"] = ["no-op"]
+    assert verify.drift_of(change) is None
+
+
+def test_plan_dirs(tmp_path):
+    for one in ["a/vpc", "a/.tfcli/init", "b"]:
+        (tmp_path / one).mkdir(parents=True)
+        (tmp_path / one / "main.tf").write_text("")
+        (tmp_path / one / "terraform.tfstate").write_text("{}")
+    assert list(verify.plan_dirs(str(tmp_path))) == [
+        str(tmp_path / "a" / "vpc"),
+        str(tmp_path / "b"),
+    ]
+
+
+def test_fast_plan_refreshes_touched_only(monkeypatch, tmp_path):
+    root = tmp_path / "sqs"
+    root.mkdir()
+    (root / "main.tf").write_text("")
+    (root / "terraform.tfstate").write_text("{}")
+    save_manifest(
+        str(root),
+        "Sqs",
+        {"aws_sqs_queue.a": dict(touched=True), "aws_sqs_queue.b": dict()},
+    )
+    plans = []
+
+    def fake_plan_all(jobs, logger=None, timeout=None, concurrency=4):
+        plans.extend(jobs)
+        return [
+            (
+                [
+                    dict(address="aws_sqs_queue." + name, action="update", args=args)
+                    for name in ["a", "b"]
+                ],
+                1.0,
+            )
+            for _, args in jobs
+        ]
+
+    monkeypatch.setattr(verify, "plan_all", fake_plan_all)
+    report = verify.verify(str(tmp_path), fast=True)
+    assert plans == [
+        (str(root), ["-refresh=false"]),
+        (str(root), ["-target=aws_sqs_queue.a"]),
+    ]
+    (one,) = report["directories"]
+    assert [(_["address"], _["args"]) for _ in one["changes"]] == [
+        ("aws_sqs_queue.b", ["-refresh=false"]),
+        ("aws_sqs_queue.a", ["-target=aws_sqs_queue.a"]),
+    ]
+    assert (one["counts"], one["elapsed"]) == (dict(update=2), 2.0)
+
+
+FAKE_TERRAFORM = """#!{python}
+import json
+import sys
+
+if sys.argv[1] == "plan":
+    sys.exit(2)  # changes are present
+change = dict(
+    address="aws_sqs_queue.q",
+    type="aws_sqs_queue",
+    change=dict(actions=["update"], before=dict(a=1), after=dict(a=2)),
+)
+# terraform writes the rest of the document after resource changes, which is
+# large for real states
+sys.stdout.write(json.dumps(dict(resource_changes=[change]))[:-1])
+for i in range(2000):
+    sys.stdout.write(', "prior_state_{{}}": "{{}}"'.format(i, "x" * 4096))
+sys.stdout.write("}}")
+"""
+
+
+def fake_terraform(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "terraform"
+    script.write_text(FAKE_TERRAFORM.format(python=sys.executable))
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", "{}:{}".format(bin_dir, os.environ["PATH"]))
+
+
+def test_verify_with_large_plan(tmp_path, monkeypatch):
+    fake_terraform(tmp_path, monkeypatch)
+    root = tmp_path / "output" / "sqs"
+    root.mkdir(parents=True)
+    (root / "main.tf").write_text("")
+    (root / "terraform.tfstate").write_text("{}")
+    report = verify.verify(str(tmp_path / "output"))
+    assert report["summary"]["errors"] == 0
+    assert report["summary"]["drifted"] == 1
+    (one,) = report["directories"]
+    assert one["changes"] == [
+        dict(
+            address="aws_sqs_queue.q",
+            type="aws_sqs_queue",
+            action="update",
+            attributes=["a"],
+        )
+    ]
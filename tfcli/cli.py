@@ -2,17 +2,45 @@ import click
 import logging
 import tempfile
 from os import path
+from os import environ, makedirs
 from glob import glob
 import shutil
 import json
 import re
 import subprocess
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
-from . import format_logger
+from . import format_logger, runner
+from .imports import import_with_blocks
 from .resources import RESOURCE_TYPES
+from .resources.base import init_providers
+from .resources.clients import CLIENT_POOL
+from .resources.manifest import META_DIR
+from .resources.ratelimit import RateLimiter
+from .resources.inventory import list_snapshots
+from .state import (
+    CONFLICT_POLICIES,
+    configure as configure_state,
+    diff_states,
+    extract_resources,
+    index_path,
+    load_index,
+    merge_state_files,
+    resource_address,
+    split_state,
+    write_state,
+)
+from .resources.journal import Journal, list_journals
+from .verify import verify as verify_dirs
 
 logger = logging.getLogger("tfcli")
 
+# directory of global types in the output of a sync of several regions
+GLOBAL_DIR = "global"
+
 
 @click.group()
 @click.option("--debug/--no-debug", default=False)
@@ -45,8 +73,15 @@ def state(ctx: click.Context):
     default="terraform.tfstate",
     help="original terraform state file",
 )
+@click.option(
+    "--index/--no-index",
+    default=False,
+    help="copy resources by the byte ranges of a sidecar index instead of parsing the whole state",
+)
 @click.argument("resources", nargs=-1)
-def state_extract(ctx: click.Context, out_file: str, state_file, resources: list):
+def state_extract(
+    ctx: click.Context, out_file: str, state_file, index, resources: list
+):
     if len(resources) < 1:
         click.echo("You should provide at least one resource to extract")
         exit(-1)
@@ -67,6 +102,16 @@ def state_extract(ctx: click.Context, out_file: str, state_file, resources: list
     )
     if not path.exists(state_file):
         raise FileNotFoundError(state_file)
+    if index:
+        sidecar = load_index(state_file)
+        entries = [_ for _ in sidecar["resources"] if _["type"].lower() in resources]
+        if len(entries) == 0:
+            logger.warning("No resource state is found for {}".format(resources))
+        elif dry_run:
+            click.echo("\n".join(_["address"] for _ in entries))
+        else:
+            extract_resources(state_file, sidecar, entries, out_file)
+        return
     try:
         with open(state_file, "rt") as sf:
             state_json = json.load(sf)
@@ -74,21 +119,200 @@ def state_extract(ctx: click.Context, out_file: str, state_file, resources: list
         logger.error("fail to parse state file. error:{}", ex)
         raise ex
     else:
-        all_res = state_json["modules"][0]["resources"]
-        kept = dict()
-        for k, v in all_res.items():
-            _type = k.split(".")[0]
-            if _type.lower() in resources:
-                kept[k] = v
-        state_json["modules"][0]["resources"] = kept
+        if state_json.get("version", 3) >= 4:
+            kept = [
+                _ for _ in state_json["resources"] if _["type"].lower() in resources
+            ]
+            addresses = [resource_address(_) for _ in kept]
+            state_json["resources"] = kept
+        else:
+            all_res = state_json["modules"][0]["resources"]
+            kept = dict()
+            for k, v in all_res.items():
+                _type = k.split(".")[0]
+                if _type.lower() in resources:
+                    kept[k] = v
+            addresses = list(kept.keys())
+            state_json["modules"][0]["resources"] = kept
         if len(kept) == 0:
             logger.warning("No resource state is found for {}".format(resources))
         else:
             if dry_run:
-                click.echo("\n".join(kept.keys()))
+                click.echo("\n".join(addresses))
             else:
-                with open(out_file, "wt") as of:
-                    json.dump(state_json, of, indent=2)
+                write_state(out_file, state_json)
+
+
+@state.command(name="index")
+@click.pass_context
+@click.argument("state_file", default="terraform.tfstate", type=click.Path(exists=True))
+def state_index(ctx: click.Context, state_file):
+    """build the sidecar index of byte ranges of resources in STATE_FILE"""
+    index = load_index(state_file, rebuild=True)
+    click.echo(
+        "{} resources of state v{} indexed in {}".format(
+            len(index["resources"]),
+            index["meta"].get("version"),
+            index_path(state_file),
+        )
+    )
+
+
+@state.command(name="split")
+@click.pass_context
+@click.option(
+    "--state-file",
+    "-s",
+    default="terraform.tfstate",
+    help="original terraform state file",
+)
+@click.option(
+    "--out-dir",
+    "-o",
+    default=".",
+    type=click.Path(file_okay=False),
+    help="directory of the split states, each is named <group>.tfstate",
+)
+@click.argument("groups", nargs=-1)
+def state_split(ctx: click.Context, state_file, out_dir, groups):
+    """split STATE_FILE into one state per group of GROUPS in one pass, a group
+    is a resource type alias like `network` or `iam`, or <name>=<type>[,...]
+    """
+    if len(groups) < 1:
+        click.echo("You should provide at least one group to split into")
+        exit(-1)
+    if not path.exists(state_file):
+        raise FileNotFoundError(state_file)
+    splits = OrderedDict()
+    for text in groups:
+        name, sep, types = text.partition("=")
+        if sep:
+            types = split_list(types)
+        elif name in RESOURCE_TYPES:
+            types = [
+                _type
+                for cls in flatten_types([name])
+                for _type in cls.included_resource_types()
+            ]
+        else:
+            raise click.BadParameter(
+                "{} should be one of {} or like <name>=<type>[,...]".format(
+                    text, ", ".join(RESOURCE_TYPES.keys())
+                )
+            )
+        splits[path.join(out_dir, "{}.tfstate".format(name))] = types
+    if ctx.obj["dry-run"]:
+        for out_file, types in splits.items():
+            click.echo("{}: {}".format(out_file, ", ".join(types)))
+        return
+    makedirs(out_dir, exist_ok=True)
+    for out_file, count in split_state(state_file, splits).items():
+        if count:
+            click.echo("{} resources split into {}".format(count, out_file))
+        else:
+            logger.warning("No resource state is found for {}".format(out_file))
+
+
+@state.command(name="merge")
+@click.pass_context
+@click.option(
+    "--out-file",
+    "-o",
+    default="terraform.tfstate",
+    help="output path for the merged state",
+)
+@click.option(
+    "--on-conflict",
+    type=click.Choice(CONFLICT_POLICIES),
+    default="error",
+    help="how to resolve resources of the same address: refuse to merge, keep the one of the first, last or greatest serial state",
+)
+@click.option(
+    "--workers",
+    type=int,
+    default=None,
+    help="number of processes to read states with, default to the number of CPUs",
+)
+@click.argument("sources", nargs=-1, type=click.Path(exists=True))
+def state_merge(ctx: click.Context, out_file, on_conflict, workers, sources):
+    """merge v4 states of SOURCES into one state, a directory such as the
+    output of sync stands for all terraform.tfstate under it
+    """
+    state_files = []
+    for one in sources:
+        if path.isdir(one):
+            state_files.extend(
+                sorted(glob(path.join(one, "**", "terraform.tfstate"), recursive=True))
+            )
+        else:
+            state_files.append(one)
+    state_files = [_ for _ in state_files if path.abspath(_) != path.abspath(out_file)]
+    if len(state_files) < 1:
+        click.echo("You should provide at least one state file to merge")
+        exit(-1)
+    if ctx.obj["dry-run"]:
+        click.echo("\n".join(state_files))
+        return
+    try:
+        count, conflicts = merge_state_files(
+            state_files, out_file, on_conflict, workers
+        )
+    except ValueError as ex:
+        logger.error("fail to merge states: {}".format(ex))
+        exit(1)
+    if conflicts:
+        logger.warning(
+            "{} resources in more than one state are resolved by {}".format(
+                len(conflicts), on_conflict
+            )
+        )
+    click.echo(
+        "{} resources of {} states merged into {}".format(
+            count, len(state_files), out_file
+        )
+    )
+
+
+@state.command(name="diff")
+@click.pass_context
+@click.option(
+    "--json/--no-json",
+    "as_json",
+    default=False,
+    help="print the diff as json, with before and after values of attributes",
+)
+@click.option(
+    "--all-attributes/--no-all-attributes",
+    default=False,
+    help="also report attributes ignored by the resource classes, such as computed ones",
+)
+@click.argument("before", type=click.Path(exists=True, dir_okay=False))
+@click.argument("after", type=click.Path(exists=True, dir_okay=False))
+def state_diff(ctx: click.Context, as_json, all_attributes, before, after):
+    """diff resources of v4 states BEFORE and AFTER by address.
+    Exit code is 0 if they are the same, or 2 if they differ.
+    """
+    ignore = None if all_attributes else ignored_attribute
+    try:
+        report = diff_states(before, after, ignore)
+    except ValueError as ex:
+        logger.error("fail to diff states: {}".format(ex))
+        exit(1)
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+    else:
+        for address in report["added"]:
+            click.echo("+ {}".format(address))
+        for address in report["removed"]:
+            click.echo("- {}".format(address))
+        for one in report["changed"]:
+            click.echo(
+                "~ {}: {}".format(
+                    one["address"], ", ".join(_["name"] for _ in one["attributes"])
+                )
+            )
+    if report["added"] or report["removed"] or report["changed"]:
+        exit(2)
 
 
 @state.command(name="import")
@@ -99,8 +323,13 @@ def state_extract(ctx: click.Context, out_file: str, state_file, resources: list
     help="output path for extracted resource state, default will be terraform.tfstate or <resource>.tfstate",
     required=False,
 )
+@click.option(
+    "--import-blocks/--no-import-blocks",
+    default=False,
+    help="import all resources with one plan and apply of import blocks, needs terraform>=1.5",
+)
 @click.argument("tf", nargs=-1)
-def state_import(ctx: click.Context, out_file: str, tf: list):
+def state_import(ctx: click.Context, out_file: str, import_blocks, tf: list):
     if not tf:
         tf = glob("*.tf")
     if not out_file:
@@ -117,6 +346,17 @@ def state_import(ctx: click.Context, out_file: str, tf: list):
     resource_head = re.compile(
         r'^\s*resource\s+"([\w_-]+)"\s+"([\w_-]+)"\s+', re.MULTILINE
     )
+    if import_blocks:
+        pending = []
+        for item in tf:
+            with open(item, "rt") as fd:
+                pending.extend(
+                    ("{0}.{1}".format(_type, _id), _id)
+                    for _type, _id in resource_head.findall(fd.read())
+                )
+        if import_with_blocks(path.curdir, pending, logger):
+            return
+        logger.info("fall back to import resources one by one")
     for item in tf:
         # match lines like this: resource "aws_autoscaling_group" "EC2ContainerService-devpi-EcsInstanceAsg-PN2TBOT7N8BD" {
         failed = []
@@ -178,33 +418,606 @@ def migrate(ctx: click.Context, files):
             shutil.rmtree(td)
 
 
+def parse_filters(ctx: click.Context, param, value):
+    """parse filters like `tag:Env=prod` or `vpc-id=vpc-1,vpc-2` to dict of
+    filter name to values
+    """
+    filters = OrderedDict()
+    for text in value:
+        name, sep, values = text.partition("=")
+        if not sep or not name or not values:
+            raise click.BadParameter(
+                "{} should be like <name>=<value>[,...]".format(text)
+            )
+        filters.setdefault(name, []).extend(values.split(","))
+    return filters
+
+
+def parse_rate_limits(ctx: click.Context, param, value):
+    """parse rate limits like `20`, `iam=5` or `ec2.DescribeInstances=2` to a
+    default rate and dict of `<service>[.<Operation>]` to rate
+    """
+    rate, limits = None, dict()
+    for text in value:
+        name, sep, limit = text.rpartition("=")
+        try:
+            limit = float(limit)
+        except ValueError:
+            raise click.BadParameter(
+                "{} should be like [<service>[.<Operation>]=]<rate>".format(text)
+            ) from None
+        if limit <= 0:
+            raise click.BadParameter("rate of {} should be positive".format(text))
+        if sep:
+            limits[name] = limit
+        else:
+            rate = limit
+    return rate, limits
+
+
 @cli.command()
 @click.pass_context
 @click.option(
     "--types",
     "-t",
-    required=True,
     multiple=True,
     type=click.Choice(RESOURCE_TYPES.keys()),
     help="resource types to sync",
 )
+@click.option(
+    "--resume/--no-resume",
+    default=False,
+    help="skip types completed by previous run, and only import its failed or pending resources",
+)
+@click.option(
+    "--status",
+    is_flag=True,
+    default=False,
+    help="print progress of the imports in OUTPUT instead of syncing",
+)
+@click.option(
+    "--refresh-inventory/--no-refresh-inventory",
+    default=False,
+    help="enumerate resources again instead of reusing inventory of this run or snapshot",
+)
+@click.option(
+    "--inventory-ttl",
+    default=0,
+    type=click.IntRange(min=0),
+    help="seconds to reuse on-disk inventory snapshot for, 0 to disable snapshot",
+)
+@click.option(
+    "--incremental/--no-incremental",
+    default=False,
+    help="only import new resources, remove state of deleted ones, and render changed ones",
+)
+@click.option(
+    "--max-workers",
+    default=8,
+    type=click.IntRange(min=1),
+    help="concurrency limit of child lookups while listing resources",
+)
+@click.option(
+    "--synthesize-state/--no-synthesize-state",
+    default=False,
+    help="build state of simple resource types from describe records instead of terraform import",
+)
+@click.option(
+    "--command-timeout",
+    type=click.IntRange(min=1),
+    help="seconds to wait for each terraform command before killing it",
+)
+@click.option(
+    "--compact-state/--no-compact-state",
+    default=False,
+    help="write state files without indent, for states not to be read or diffed by human",
+)
+@click.option(
+    "--import-retries",
+    default=3,
+    type=click.IntRange(min=0),
+    help="max passes to retry imports failed of throttling, timeout or state lock",
+)
+@click.option(
+    "--import-blocks/--no-import-blocks",
+    default=False,
+    help="import each type with one plan and apply of import blocks, needs terraform>=1.5",
+)
+@click.option(
+    "--import-workers",
+    default=1,
+    type=click.IntRange(min=1),
+    help="number of `terraform import` to run at the same time for each type",
+)
+@click.option(
+    "--max-pool-connections",
+    default=50,
+    type=click.IntRange(min=1),
+    help="max number of kept-alive connections of each AWS client",
+)
+@click.option(
+    "--filter",
+    "filters",
+    multiple=True,
+    callback=parse_filters,
+    help="server side filter of EC2 resources, such as tag:Env=prod or vpc-id=vpc-123",
+)
+@click.option(
+    "--rate-limit",
+    "rate_limits",
+    multiple=True,
+    callback=parse_rate_limits,
+    help="max AWS requests per second of each API, like 20, iam=5 or ec2.DescribeInstances=2",
+)
+@click.option(
+    "--regions",
+    help="comma separated regions to sync in parallel, each into <output>/<region>, "
+    "global types such as role and s3 are synced once into <output>/global",
+)
+@click.option(
+    "--profiles",
+    help="comma separated AWS profiles of accounts to sync, each into <output>/<account>",
+)
+@click.option(
+    "--assume-role-arns",
+    help="comma separated roles to assume for accounts to sync, each into <output>/<account>",
+)
+@click.option(
+    "--max-parallel",
+    default=8,
+    type=click.IntRange(min=1),
+    help="max number of accounts and regions to sync at the same time",
+)
 @click.argument("output", default=".", type=click.Path(dir_okay=True))
-def sync(ctx: click.Context, types, output):
+def sync(
+    ctx: click.Context,
+    types,
+    resume,
+    status,
+    output,
+    refresh_inventory,
+    inventory_ttl,
+    incremental,
+    synthesize_state,
+    max_workers,
+    import_workers,
+    import_retries,
+    import_blocks,
+    command_timeout,
+    compact_state,
+    max_pool_connections,
+    filters,
+    rate_limits,
+    regions,
+    profiles,
+    assume_role_arns,
+    max_parallel,
+):
+    if status:
+        echo_status(output)
+        return
+    if not types:
+        raise click.UsageError("Missing option '--types' / '-t'.")
+    flattened = flatten_types(types)
+    click.echo(
+        "sync {} to {}".format(",".join([_.__name__ for _ in flattened]), output)
+    )
+    options = dict(
+        debug=ctx.obj["debug"],
+        refresh_inventory=refresh_inventory,
+        resume=resume,
+        incremental=incremental,
+        max_workers=max_workers,
+        import_workers=import_workers,
+        import_retries=import_retries,
+        import_blocks=import_blocks,
+        command_timeout=command_timeout,
+        compact_state=compact_state,
+        max_pool_connections=max_pool_connections,
+        rate_limits=rate_limits,
+        filters=filters,
+        snapshot_ttl=inventory_ttl,
+        synthesize_state=synthesize_state,
+    )
+    accounts = [dict(profile=_) for _ in split_list(profiles)]
+    accounts.extend(dict(role_arn=_) for _ in split_list(assume_role_arns))
+    regions = split_list(regions)
+    # every type, account and region shares the same provider plugins,
+    # which are installed by one `terraform init` of this run
+    if "TF_PLUGIN_CACHE_DIR" not in environ:
+        environ["TF_PLUGIN_CACHE_DIR"] = path.abspath(
+            path.join(output, ".terraform.d", "plugin-cache")
+        )
+    if not path.exists(environ["TF_PLUGIN_CACHE_DIR"]):
+        shutil.os.makedirs(environ["TF_PLUGIN_CACHE_DIR"])
+    options["init_dir"] = path.abspath(path.join(output, META_DIR, "init"))
+    rc = init_providers(options["init_dir"], logger)
+    if rc != 0:
+        exit(rc)
+    if not accounts and not regions:
+        summaries = [sync_resources(flattened, output, **options)]
+    else:
+        jobs = sync_jobs(flattened, regions)
+        # each account and region is synced in its own process, with its own AWS clients
+        with ProcessPoolExecutor(max_workers=max_parallel) as executor:
+            futures = [
+                executor.submit(
+                    sync_resources,
+                    types,
+                    output,
+                    account_dir=bool(accounts),
+                    **where,
+                    **account,
+                    **options,
+                )
+                for account in accounts or [dict()]
+                for types, where in jobs
+            ]
+            summaries = [_.result() for _ in futures]
+    echo_summaries(summaries)
+    if any(_["error"] for _ in summaries):
+        exit(1)
+
+
+def sync_jobs(types, regions):
+    """split resource classes to sync of each account by regions, global types
+    are listed the same from every region, so they are synced once into
+    `global` with the first region
+
+    :return: list of (resource classes, arguments of `sync_resources`)
+    """
+    global_types = [_ for _ in types if regions and _.is_global]
+    regional_types = [_ for _ in types if _ not in global_types]
+    jobs = []
+    if regional_types:
+        jobs.extend(
+            (regional_types, dict(region=region, region_dir=bool(regions)))
+            for region in regions or [None]
+        )
+    if global_types:
+        jobs.append((global_types, dict(region=regions[0], global_dir=True)))
+    return jobs
+
+
+def flatten_types(types):
+    """resource classes of resource types, aliases like `network` are expanded"""
     flattened = []
     for t in types:
         if isinstance(RESOURCE_TYPES[t], list):
             flattened.extend(RESOURCE_TYPES[t])
         else:
             flattened.append(RESOURCE_TYPES[t])
+    return flattened
+
+
+@lru_cache()
+def _classes_of_types():
+    classes = dict()
+    for cls in flatten_types(RESOURCE_TYPES.keys()):
+        for _type in cls.included_resource_types():
+            classes.setdefault(_type, cls)
+    return classes
+
+
+def ignored_attribute(_type, key, value):
+    """whether an attribute is ignored by the resource class of its type"""
+    cls = _classes_of_types().get(_type)
+    try:
+        return bool(cls and cls.ignore_attrbute(key, value))
+    except (TypeError, KeyError, IndexError):  # rules expect values of the key
+        return False
+
+
+def split_list(text):
+    """split comma separated text to a list, empty items are dropped"""
+    return [_.strip() for _ in (text or "").split(",") if _.strip()]
+
+
+def sync_resources(
+    resources,
+    output,
+    region=None,
+    profile=None,
+    role_arn=None,
+    account_dir=False,
+    region_dir=False,
+    global_dir=False,
+    debug=False,
+    refresh_inventory=False,
+    resume=False,
+    incremental=False,
+    import_workers=1,
+    import_retries=3,
+    import_blocks=False,
+    init_dir=None,
+    command_timeout=None,
+    compact_state=False,
+    max_pool_connections=50,
+    rate_limits=(None, None),
+    **options
+):
+    """sync each kind of resources into
+    `<output>[/<account>][/<region>|/global]/<type>`
+
+    :param resources: resource classes to sync
+    :param output: output directory
+    :param region: AWS region to sync, default to the one of environment
+    :param profile: AWS profile to sync with, default to the one of environment
+    :param role_arn: role to assume with credentials of the profile
+    :param account_dir: whether to put resources into a directory of the account
+    :param region_dir: whether to put resources into a directory of the region
+    :param global_dir: whether to put resources into the directory of global
+        types, which are synced once for all regions
+    :param resume: whether to skip types completed by previous run
+    :param import_workers: number of `terraform import` to run at the same time
+    :param import_retries: max passes to retry imports of transient failures
+    :param import_blocks: whether to import with import blocks of terraform>=1.5
+    :param init_dir: directory initialized once for all types to share
+    :param command_timeout: seconds to wait for each terraform command
+    :param compact_state: whether to write state files without indent
+    :param rate_limits: tuple of default rate and dict of rates of AWS APIs
+    :param options: other options to create resources with
+    :return: summary of this sync
+    """
+    if not logger.handlers:  # in a spawned worker process
+        format_logger(logger, debug)
+    runner.configure(timeout=command_timeout)
+    configure_state(compact=compact_state)
+    rate, limits = rate_limits
+    CLIENT_POOL.configure(
+        max_pool_connections=max_pool_connections,
+        limiter=RateLimiter(rate or 20.0, limits),
+    )
+    started = time.time()
+    summary = dict(
+        region=region,
+        account=profile or role_arn,
+        output=output,
+        types=0,
+        resources=0,
+        failed=[],
+        error=None,
+    )
+    try:
+        if account_dir:
+            output = path.join(output, CLIENT_POOL.account_id(profile, role_arn))
+        if region_dir:
+            output = path.join(output, region)
+        elif global_dir:
+            output = path.join(output, GLOBAL_DIR)
+        summary["output"] = output
+        for r in resources:
+            res = r(
+                logger=logger,
+                region=region,
+                profile=profile,
+                role_arn=role_arn,
+                **options,
+            )
+            _type = r.__name__.lower()
+            root = path.abspath(path.join(output, _type))
+            if not path.exists(root):
+                shutil.os.makedirs(root)
+            logger.info("+" * 25 + "  " + _type.upper() + "  " + "+" * 25)
+            journal = Journal(root)
+            if resume and journal.is_done(r.__name__):
+                logger.info("skip {} which is completed by previous run".format(_type))
+                continue
+            if refresh_inventory:
+                res.inventory(refresh=True)
+            res.create_tfconfig(root)
+            summary["failed"].extend(
+                res.load_tfstate(
+                    root,
+                    incremental=incremental,
+                    import_workers=import_workers,
+                    import_retries=import_retries,
+                    import_blocks=import_blocks,
+                    init_dir=init_dir,
+                )
+            )
+            res.sync_tfstate(root, incremental=incremental)
+            journal.append("done", resource=r.__name__)
+            summary["types"] += 1
+            summary["resources"] += len(res.inventory())
+    except (Exception, SystemExit) as ex:
+        logger.exception("fail to sync to {}".format(output))
+        summary["error"] = repr(ex)
+    summary["elapsed"] = time.time() - started
+    summary["api"] = CLIENT_POOL.limiter.stats()
+    for api, stats in summary["api"].items():
+        logger.debug("{}: {}".format(api, stats))
+    return summary
+
+
+def echo_summaries(summaries):
+    """print a combined summary of sync runs"""
+    click.echo("=" * 80)
     click.echo(
-        "sync {} to {}".format(",".join([_.__name__ for _ in flattened]), output)
+        "{:<40} {:>6} {:>9} {:>6} {:>9}  {}".format(
+            "output", "types", "resources", "failed", "elapsed", "error"
+        )
     )
-    for r in flattened:
-        res, _type = r(logger=logger), r.__name__.lower()
-        root = path.abspath(path.join(output, _type))
-        if not path.exists(root):
-            shutil.os.makedirs(root)
-        logger.info("+" * 25 + "  " + _type.upper() + "  " + "+" * 25)
-        res.create_tfconfig(root)
-        res.load_tfstate(root)
-        res.sync_tfstate(root)
+    for one in summaries:
+        error = one["error"] or ""
+        if error and one["account"]:
+            error = "{}: {}".format(one["account"], error)
+        click.echo(
+            "{:<40} {:>6} {:>9} {:>6} {:>8.1f}s  {}".format(
+                one["output"],
+                one["types"],
+                one["resources"],
+                len(one["failed"]),
+                one["elapsed"],
+                error,
+            )
+        )
+    throttled = [
+        (one["output"], api, stats)
+        for one in summaries
+        for api, stats in one["api"].items()
+        if stats["throttled"]
+    ]
+    if throttled:
+        click.echo("=" * 80)
+        click.echo(
+            "{:<40} {:<30} {:>6} {:>9} {:>8} {:>9}".format(
+                "output", "throttled api", "calls", "throttled", "waited", "rate"
+            )
+        )
+        for output, api, stats in throttled:
+            click.echo(
+                "{:<40} {:<30} {:>6} {:>9} {:>7.1f}s {:>5.1f}/{:<3.0f}".format(
+                    output,
+                    api,
+                    stats["calls"],
+                    stats["throttled"],
+                    stats["waited"],
+                    stats["rate"],
+                    stats["max_rate"],
+                )
+            )
+    click.echo("=" * 80)
+
+
+@cli.command()
+@click.pass_context
+@click.option(
+    "--concurrency",
+    default=4,
+    type=click.IntRange(min=1),
+    help="max number of terraform plans to run at the same time",
+)
+@click.option(
+    "--timeout",
+    type=click.IntRange(min=1),
+    help="seconds to wait for each plan",
+)
+@click.option(
+    "--out-file",
+    "-o",
+    help="path to write drift report to, default to stdout",
+)
+@click.option(
+    "--fast/--no-fast",
+    default=False,
+    help="skip refresh for directories just synced, only refresh resources touched by sync",
+)
+@click.argument("output", default=".", type=click.Path(exists=True, file_okay=False))
+def verify(ctx: click.Context, concurrency, timeout, out_file, fast, output):
+    """plan every synced directory under OUTPUT, and report drift as json.
+    Exit code is 0 if there is no drift, 2 if there is, or 1 if any plan fails.
+    """
+    report = verify_dirs(output, concurrency, logger, timeout, fast)
+    if out_file:
+        with open(out_file, "wt") as fd:
+            json.dump(report, fd, indent=2)
+    else:
+        click.echo(json.dumps(report, indent=2))
+    summary = report["summary"]
+    logger.info(
+        "{} of {} directories drifted, {} failed".format(
+            summary["drifted"], summary["directories"], summary["errors"]
+        )
+    )
+    if summary["errors"]:
+        exit(1)
+    if summary["drifted"]:
+        exit(2)
+
+
+def echo_status(output):
+    """print progress of imports of every output directory under `output`"""
+    click.echo(
+        "{:<40} {:<10} {:>6} {:>6} {:>6} {:>7} {:>9}  {}".format(
+            "output", "resource", "total", "ok", "failed", "pending", "elapsed", "state"
+        )
+    )
+    for root, journal in list_journals(output):
+        for run in journal.status().values():
+            if run["done"]:
+                state = "done"
+            elif time.time() - run["updated"] > 600:  # no import for a while
+                state = "interrupted"
+            else:
+                state = "running"
+            click.echo(
+                "{:<40} {:<10} {:>6} {:>6} {:>6} {:>7} {:>8.1f}s  {}".format(
+                    path.relpath(root, output),
+                    run["resource"],
+                    run["total"],
+                    run["ok"],
+                    run["failed"],
+                    run["pending"],
+                    run["elapsed"],
+                    state,
+                )
+            )
+
+
+@cli.group()
+@click.pass_context
+def inventory(ctx: click.Context):
+    pass
+
+
+@inventory.command(name="show")
+@click.pass_context
+@click.option(
+    "--items/--no-items", default=False, help="also print items of each snapshot"
+)
+def inventory_show(ctx: click.Context, items):
+    click.echo(
+        "{:<14} {:<16} {:<16} {:>7} {:>9}".format(
+            "account", "region", "resource", "items", "age"
+        )
+    )
+    for one in list_snapshots():
+        click.echo(
+            "{:<14} {:<16} {:<16} {:>7} {:>8.0f}s".format(
+                one["account"],
+                one["region"],
+                one["resource"],
+                len(one["items"]),
+                one["age"],
+            )
+        )
+        if items:
+            for _type, name, _id in one["items"]:
+                click.echo("    {}.{} {}".format(_type, name, _id))
+
+
+@inventory.command(name="refresh")
+@click.pass_context
+@click.option(
+    "--types",
+    "-t",
+    required=True,
+    multiple=True,
+    type=click.Choice(RESOURCE_TYPES.keys()),
+    help="resource types to refresh inventory snapshot of",
+)
+@click.option("--region", help="AWS region, default to the one of environment")
+@click.option("--profile", help="AWS profile, default to the one of environment")
+@click.option("--assume-role-arn", help="role to assume with the profile")
+@click.option(
+    "--filter",
+    "filters",
+    multiple=True,
+    callback=parse_filters,
+    help="server side filter of EC2 resources, such as tag:Env=prod or vpc-id=vpc-123",
+)
+def inventory_refresh(
+    ctx: click.Context, types, region, profile, assume_role_arn, filters
+):
+    for r in flatten_types(types):
+        # any positive ttl makes the enumerated inventory saved as snapshot
+        res = r(
+            logger=logger,
+            region=region,
+            profile=profile,
+            role_arn=assume_role_arn,
+            filters=filters,
+            snapshot_ttl=1,
+        )
+        click.echo("{}: {} items".format(r.__name__, len(res.inventory(refresh=True))))
@@ -0,0 +1,156 @@
+import json
+import random
+import re
+import subprocess
+from collections import OrderedDict
+from os import path, remove
+
+from .util import run_cmd, terraform_version
+
+# terraform accepts `import` blocks since this version
+IMPORT_BLOCKS_VERSION = (1, 5, 0)
+IMPORTS_FILE = "tfcli-imports.tf"
+PLAN_FILE = "tfcli-imports.tfplan"
+GENERATED_FILE = "tfcli-generated.tf"
+
+# seconds to back off before the first retry of failed imports, and at most
+IMPORT_BACKOFF = 2.0
+IMPORT_BACKOFF_CAP = 60.0
+
+# kind of import failure -> (pattern of terraform stderr, whether it is transient)
+FAILURE_KINDS = OrderedDict(
+    [
+        (
+            "throttling",
+            (
+                r"Throttl|Rate exceeded|RequestLimitExceeded|TooManyRequests|SlowDown",
+                True,
+            ),
+        ),
+        (
+            "state_lock",
+            (r"Error acquiring the state lock|Error locking state", True),
+        ),
+        (
+            "timeout",
+            (
+                r"timeout|timed out|deadline exceeded|connection reset|"
+                r"RequestError: send request failed",
+                True,
+            ),
+        ),
+        (
+            "credentials",
+            (r"ExpiredToken|RequestExpired|security token .* expired", True),
+        ),
+        (
+            "not_found",
+            (
+                r"Cannot import non-existent remote object|NotFound|NoSuch|"
+                r"does not exist",
+                False,
+            ),
+        ),
+        (
+            "unsupported",
+            (
+                r"(doesn't|does not) support import|unexpected format|"
+                r"Invalid .*ID|Resource already managed by Terraform",
+                False,
+            ),
+        ),
+    ]
+)
+
+
+def classify_failure(stderr):
+    """classify a failed `terraform import` by its stderr
+
+    :return: tuple of (kind, whether it is transient), kind is `unknown` if no
+        pattern of `FAILURE_KINDS` matches, which is not retried
+    """
+    for kind, (pattern, transient) in FAILURE_KINDS.items():
+        if re.search(pattern, stderr or "", re.IGNORECASE):
+            return kind, transient
+    return "unknown", False
+
+
+def backoff_delay(attempt):
+    """seconds to wait before an attempt of retry, with full jitter"""
+    return random.uniform(0, min(IMPORT_BACKOFF_CAP, IMPORT_BACKOFF * 2 ** attempt))
+
+
+def render_import_blocks(pending):
+    """terraform configuration of import blocks
+
+    :param pending: list of (address, id) to import
+    """
+    return "".join(
+        "import {{\n  to = {}\n  id = {}\n}}\n\n".format(address, json.dumps(_id))
+        for address, _id in pending
+    )
+
+
+def unexpected_changes(plan: dict):
+    """addresses of a plan, in `terraform show -json` format, which would be
+    changed other than being imported
+    """
+    return [
+        _["address"]
+        for _ in plan.get("resource_changes", [])
+        if _["change"]["actions"] != ["no-op"]
+    ]
+
+
+def import_with_blocks(cwd, pending, logger, generate_config=False):
+    """import resources with one plan and apply of import blocks, instead of
+    one `terraform import` process per resource. Nothing is applied unless the
+    plan only imports resources.
+
+    :param cwd: initialized terraform directory to import in
+    :param pending: list of (address, id) to import
+    :param logger: logger to use
+    :param generate_config: whether to generate configuration of the resources,
+        for directory without it
+    :return: whether all resources are imported, False to fall back to
+        `terraform import`
+    """
+    version = terraform_version()
+    if not version or version < IMPORT_BLOCKS_VERSION:
+        logger.info(
+            "terraform {} does not support import blocks".format(
+                ".".join(map(str, version or ["unknown"]))
+            )
+        )
+        return False
+    with open(path.join(cwd, IMPORTS_FILE), "wt") as fd:
+        fd.write(render_import_blocks(pending))
+    cmd = ["terraform", "plan", "-input=false", "-out={}".format(PLAN_FILE)]
+    if generate_config:
+        cmd.append("-generate-config-out={}".format(GENERATED_FILE))
+    try:
+        if run_cmd(cmd, logger, cwd) != 0:
+            return False
+        proc = subprocess.run(
+            ["terraform", "show", "-json", PLAN_FILE],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+        )
+        if proc.returncode != 0:
+            logger.error(proc.stderr.decode())
+            return False
+        changed = unexpected_changes(json.loads(proc.stdout.decode()))
+        if changed:
+            logger.warning(
+                "import plan would change resources, skip it:\n{}".format(
+                    "\n".join(changed)
+                )
+            )
+            return False
+        rc = run_cmd(["terraform", "apply", "-input=false", PLAN_FILE], logger, cwd)
+        return rc == 0
+    finally:
+        for name in [IMPORTS_FILE, PLAN_FILE, GENERATED_FILE]:
+            if path.exists(path.join(cwd, name)):
+                remove(path.join(cwd, name))
@@ -5,8 +5,8 @@ class Asg(BaseResource):
     """ autoscaling group resource to generate from current region
     """
 
-    def __init__(self, logger=None):
-        super().__init__(logger)
+    def __init__(self, logger=None, **kwargs):
+        super().__init__(logger, **kwargs)
 
     def amend_attributes(self, _type, _name, attributes: dict):
         if "launch_template" in attributes and attributes["launch_template"]:
@@ -34,8 +34,8 @@ class Asg(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        asg = self.session.client("autoscaling")
-        items = asg.describe_auto_scaling_groups()["AutoScalingGroups"]
+        asg = self.client("autoscaling")
+        items = self.paginate(asg, "describe_auto_scaling_groups", "AutoScalingGroups")
         for item in items:
             _name = _id = item["AutoScalingGroupName"]
             yield "aws_autoscaling_group", _name, _id
@@ -45,8 +45,10 @@ class LaunchTemplate(BaseResource):
     """ launch template resource to generate from current region
     """
 
-    def __init__(self, logger=None):
-        super().__init__(logger)
+    computed_attributes = ("latest_version",)
+
+    def __init__(self, logger=None, **kwargs):
+        super().__init__(logger, **kwargs)
 
     def amend_attributes(self, _type, _name, attributes: dict):
         if "launch_template" in attributes and attributes["launch_template"]:
@@ -74,8 +76,8 @@ class LaunchTemplate(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        ec2 = self.session.client("ec2")
-        items = ec2.describe_launch_templates()["LaunchTemplates"]
+        ec2 = self.client("ec2")
+        items = self.paginate(ec2, "describe_launch_templates", "LaunchTemplates")
         for item in items:
             _name = _id = item["LaunchTemplateId"]
             yield "aws_launch_template", _name, _id
@@ -1,30 +1,160 @@
-import boto3
 import logging
+import copy
 import json
+import hashlib
 import jinja2
-from uuid import uuid4
-from os import path
+import jmespath
+import shutil
+import time
+from os import path, listdir, makedirs, symlink
 from os import environ
 from abc import ABCMeta, abstractmethod
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 
+from .builders import build_state
+from .clients import CLIENT_POOL
+from .inventory import load_snapshot, save_snapshot
+from .journal import Journal, save_failures
+from .manifest import META_DIR, load_manifest, save_manifest
+from ..imports import backoff_delay, classify_failure, import_with_blocks
+from ..state import (
+    empty_state,
+    merge_states,
+    read_state,
+    resource_address,
+    write_state,
+)
 from ..util import run_cmd
 from ..filters import do_hcl_body, Attribute, not_empty, normalize_identity
 
 
 NOT_IMPORTABLE_RESOURCES = ["aws_iam_group_membership"]
 
+# attributes computed by AWS, which are never in configuration
+COMPUTED_ATTRIBUTES = ["id", "arn", "owner_id", "unique_id"]
+
+
+def share_init(root, cwd):
+    """make a working directory share providers and modules initialized in root"""
+    makedirs(cwd, exist_ok=True)
+    for name in [".terraform", ".terraform.lock.hcl"]:
+        if path.exists(path.join(root, name)) and not path.lexists(
+            path.join(cwd, name)
+        ):
+            symlink(path.join(root, name), path.join(cwd, name))
+
+
+def init_providers(init_dir, logger):
+    """run `terraform init` once in a directory with only the provider block,
+    for directories of all resources to share it with `share_init`
+
+    :param init_dir: directory to initialize
+    :param logger: logger to use
+    :return: exit code of `terraform init`
+    """
+    makedirs(init_dir, exist_ok=True)
+    # values of provider arguments do not matter for init
+    tf_template = BaseResource.my_jinja_env().get_template("tf.j2")
+    with open(path.join(init_dir, "main.tf"), "wt") as fd:
+        fd.write(tf_template.render(instances=[]))
+    return run_cmd(["terraform", "init", "-input=false"], logger, init_dir)
+
 
 class BaseResource(metaclass=ABCMeta):
     """S3 resource to generate from current region"""
 
-    def __init__(self, logger=None):
+    # run-scoped inventory shared by all phases (and instances) of a sync run
+    _inventory_cache = dict()
+
+    # names of EC2 API `Filters` supported when listing this kind of resources,
+    # names ending with ":" are prefixes, such as "tag:" for "tag:<key>"
+    supported_filters = ()
+
+    # attributes computed by AWS of this kind of resources besides
+    # `COMPUTED_ATTRIBUTES`, ignoring them does not touch the configuration
+    computed_attributes = ()
+
+    # whether this kind of resources is listed the same from every region, such
+    # as IAM entities, they are synced once instead of once per region
+    is_global = False
+
+    def __init__(
+        self,
+        logger=None,
+        max_workers=8,
+        profile=None,
+        region=None,
+        filters=None,
+        role_arn=None,
+        snapshot_ttl=0,
+        synthesize_state=False,
+    ):
+        """
+        :param logger: logger to use, default to a basic logger of this module
+        :param max_workers: concurrency limit of child lookups in `fan_out`
+        :param profile: AWS profile to use, default to the one of environment
+        :param region: AWS region to use, default to the one of environment
+        :param filters: dict of filter name to values, to narrow down resources
+            on server side, those not in `supported_filters` are ignored
+        :param role_arn: role to assume with credentials of the profile
+        :param snapshot_ttl: seconds to reuse the on-disk inventory snapshot for,
+            0 to always enumerate from AWS without saving snapshot
+        :param synthesize_state: whether to build state of resource types in
+            `STATE_BUILDERS` from raw records, instead of `terraform import`
+        """
         if not logger:
             logger = logging.getLogger(__name__)
             message_format = "[%(asctime)s.%(msecs).03d pid#%(process)d# %(levelname).1s] %(message)s"
             logging.basicConfig(level=logging.INFO, format=message_format)
         self.logger = logger
-        self.session = boto3.Session()
+        self.max_workers = max_workers
+        self.profile = profile
+        self.region = region
+        self.role_arn = role_arn
+        self.session = CLIENT_POOL.session(profile, region, role_arn)
+        self.snapshot_ttl = snapshot_ttl
+        self.synthesize_state = synthesize_state
+        # raw describe records by API operation, only kept for snapshot or
+        # building state
+        self.records = defaultdict(list)
+        self.filters = OrderedDict()
+        for name, values in (filters or dict()).items():
+            if self.is_supported_filter(name):
+                self.filters[name] = list(values)
+            else:
+                # only worth a warning for resources which support some filters
+                log = (
+                    self.logger.warning if self.supported_filters else self.logger.debug
+                )
+                log(
+                    "ignore filter {} which is not supported by {}".format(
+                        name, type(self).__name__
+                    )
+                )
+
+    @classmethod
+    def is_supported_filter(cls, name):
+        """whether a filter can be pushed down to the API listing this resource"""
+        return any(
+            name.startswith(_) if _.endswith(":") else name == _
+            for _ in cls.supported_filters
+        )
+
+    def api_filters(self, **builtin):
+        """EC2 API `Filters` parameter from user provided filters
+
+        :param builtin: additional filters of this kind of resources, such as
+            `instance_state_name`, `_` in names are replaced by `-`
+        """
+        filters = [
+            dict(Name=name.replace("_", "-"), Values=list(values))
+            for name, values in builtin.items()
+        ]
+        filters.extend(
+            dict(Name=name, Values=values) for name, values in self.filters.items()
+        )
+        return filters
 
     @classmethod
     def my_jinja_env(cls):
@@ -59,6 +189,122 @@ class BaseResource(metaclass=ABCMeta):
         :return: list of tupe for a resource (type, name, [id, ...]) or (type, name, id)
         """
 
+    def client(self, service):
+        """get a shared client of a service from the process-wide client pool
+
+        :param service: AWS service name, such as `ec2`
+        """
+        return CLIENT_POOL.client(service, self.profile, self.region, self.role_arn)
+
+    def paginate(self, client, operation, expression, **kwargs):
+        """yield records of an AWS API call page by page, so that large accounts
+        are never truncated and only one page is kept in memory at a time
+
+        :param client: boto3 client to call the API with
+        :param operation: name of the client method, such as `describe_instances`
+        :param expression: jmespath expression to select records from one page
+        :param kwargs: parameters of the API call
+        """
+        if client.can_paginate(operation):
+            pages = client.get_paginator(operation).paginate(**kwargs)
+        else:  # not a paginated API, single response is complete
+            pages = [getattr(client, operation)(**kwargs)]
+        for page in pages:
+            for record in jmespath.search(expression, page) or []:
+                self.record(operation, record)
+                yield record
+
+    def record(self, operation, record):
+        """keep a raw describe record for inventory snapshot or building state
+
+        :param operation: name of the API operation returned the record
+        :param record: the raw record
+        """
+        if self.snapshot_ttl or self.synthesize_state:
+            self.records[operation].append(record)
+
+    def fan_out(self, func, items, max_workers=None):
+        """apply `func` to every item with a bounded thread pool, such as N+1
+        child lookups of parent resources. Results are yielded in the same order
+        of `items`, and only a limited number of them are in flight at a time.
+
+        :param func: function to call with each item, it should not be lazy
+        :param items: iterable of items to process
+        :param max_workers: concurrency limit, default to `self.max_workers`
+        """
+        max_workers = max_workers or self.max_workers
+        if max_workers <= 1:
+            yield from map(func, items)
+            return
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque()
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= max_workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def inventory_key(self):
+        """key of this resource in the run-scoped inventory cache"""
+        indexes = getattr(self, "indexes", None)
+        return (
+            type(self).__name__,
+            self.profile,
+            self.role_arn,
+            self.region,
+            tuple(indexes) if indexes else None,
+            tuple((k, tuple(v)) for k, v in self.filters.items()),
+        )
+
+    def inventory(self, refresh=False):
+        """enumerate resources once per run, and reuse the result afterwards.
+        With `snapshot_ttl`, a fresh enough on-disk snapshot is reused as well.
+
+        :param refresh: whether to drop cached inventory and enumerate again
+        :return: list of tuple for a resource as returned by `list_all`
+        """
+        key = self.inventory_key()
+        if refresh:
+            self.invalidate_inventory()
+        if key not in self._inventory_cache:
+            loaded = None
+            if self.snapshot_ttl and not refresh:
+                loaded = load_snapshot(self, self.snapshot_ttl)
+            if loaded:
+                self.logger.info(
+                    "reuse inventory snapshot of {}".format(type(self).__name__)
+                )
+            else:
+                self.records.clear()
+                loaded = list(self.list_all()), dict(self.records)
+                if self.snapshot_ttl:
+                    save_snapshot(self, *loaded)
+            self._inventory_cache[key] = loaded
+        items, records = self._inventory_cache[key]
+        self.records = defaultdict(list, records)
+        return items
+
+    @classmethod
+    def invalidate_inventory(cls):
+        """drop cached inventory of this kind of resources, or all of them when
+        called on BaseResource
+        """
+        for key in list(cls._inventory_cache):
+            if cls is BaseResource or key[0] == cls.__name__:
+                del cls._inventory_cache[key]
+
+    def provider_config(self):
+        """variables of aws provider block in the generated terraform configuration"""
+        return dict(
+            aws_region=self.region
+            or environ.get("AWS_REGION")
+            or self.session.region_name
+            or "cn-north-1",
+            aws_profile=self.profile or environ.get("AWS_PROFILE") or "default",
+            aws_role_arn=self.role_arn,
+        )
+
     def create_tfconfig(self, root, config_file="main.tf"):
         """create a terraform configuration file skeleton for this type of resources
 
@@ -72,35 +318,90 @@ class BaseResource(metaclass=ABCMeta):
         tf_template = self.my_jinja_env().get_template("tf.j2")
         instances = []
         dedup = set()
-        self.logger.info(list(self.list_all()))
-        for t, n, _id in self.list_all():
+        self.logger.info(self.inventory())
+        for t, n, _id in self.inventory():
             if isinstance(_id, list):
                 # ignore the first element which is the id
                 _id = _id[1:]
             if (t, n) not in dedup:
                 instances.append((t, n, _id))
                 dedup.add((t, n))
-        data = tf_template.render(
-            instances=instances,
-            aws_region=environ.get("AWS_REGION") or "cn-north1",
-            aws_profile=environ.get("AWS_PROFILE") or "default",
-        )
+        data = tf_template.render(instances=instances, **self.provider_config())
         with open(config_file, "wt") as fd:
             fd.truncate()
             fd.write(data)
 
-    def load_tfstate(self, root, state_file="terraform.tfstate", override=False):
+    @staticmethod
+    def import_id(name, _id):
+        """id to import a resource with, as listed by `list_all`"""
+        if isinstance(_id, list):
+            _id = _id[0]
+        return _id or name  # use name as Id if not provided
+
+    def stale_addresses(self, root):
+        """addresses of previous sync which are removed from AWS, or are now
+        with another id, their state is outdated
+
+        :param root: output directory of previous sync
+        """
+        previous = load_manifest(root, type(self).__name__)
+        current = {
+            "{}.{}".format(t, n): self.import_id(n, _id)
+            for t, n, _id in self.inventory()
+        }
+        return set(
+            address
+            for address, entry in previous.items()
+            if entry["id"] is not None and current.get(address) != entry["id"]
+        )
+
+    def load_tfstate(
+        self,
+        root,
+        state_file="terraform.tfstate",
+        override=False,
+        incremental=False,
+        import_workers=1,
+        import_blocks=False,
+        init_dir=None,
+        import_retries=3,
+    ):
         """import terraform state for this kind of resources
 
         :param root: root directory to put state file into, default to pwd
         :param state_file: state file to write/merge to
         :param override: whether to override this type of resource state
+        :param incremental: whether to remove state of resources which are
+            removed from AWS or changed id since previous sync
+        :param import_workers: number of `terraform import` to run at the same time,
+            each into its own shard state which is merged into state_file at last
+        :param import_blocks: whether to import all resources with one plan and
+            apply of import blocks, which needs terraform 1.5 or later
+        :param init_dir: directory initialized by `init_providers` to share,
+            instead of running `terraform init` in root
+        :param import_retries: max passes to retry imports failed of transient
+            errors, such as throttling or state lock
+        :return: list of failed import commands, which are also reported in
+            `<root>/.tfcli/<class>.failures.json`
         """
         if not root:
             root = path.curdir
         if not path.isabs(state_file):
             state_file = path.join(root, state_file)
 
+        stale = self.stale_addresses(root) if incremental else set()
+        if stale:
+            self.logger.info(
+                "remove state of {} stale resources:\n{}".format(
+                    len(stale), "\n".join(sorted(stale))
+                )
+            )
+        journal = Journal(root)
+        # imports of a run killed before merging its shards are not lost
+        shards_dir = path.join(root, META_DIR, "shards", type(self).__name__)
+        if path.exists(state_file) and path.exists(shards_dir):
+            self.logger.info("merge shards left by previous run")
+            self.merge_shards(state_file, shards_dir)
         # get list of all existing resource state with <resource_type>.<resource_name> as key
         existing = set()
         if path.exists(state_file):
@@ -108,35 +409,29 @@ class BaseResource(metaclass=ABCMeta):
                 jdata = json.load(fd)
             kept = []
             for res in jdata["resources"]:
+                address = "{}.{}".format(res["type"], res["name"])
+                if address in stale:
+                    continue
                 if not override or res["type"] not in self.included_resource_types():
-                    existing.add("{}.{}".format(res["type"], res["name"]))
+                    existing.add(address)
                     kept.append(res)
-            if override:
+            if override or len(kept) != len(jdata["resources"]):
                 jdata["resources"] = kept
-                with open(state_file, "wt") as fd:
-                    fd.truncate()
-                    json.dump(jdata, fd, indent=2)
+                write_state(state_file, jdata)
         else:  # create an empty `container`
-            meta = dict(
-                version=4,
-                terraform_version="0.12.24",
-                serial=1,
-                lineage=str(uuid4()),
-                output=dict(),
-                resources=list(),
-            )
-            with open(state_file, "wt") as fd:
-                fd.truncate()
-                json.dump(meta, fd, indent=2)
+            write_state(state_file, empty_state())
 
-        failed = []
+        pending = []
+        built = []
         dedup = set()
-        for i, (_type, name, _id) in enumerate(self.list_all()):
+        for i, (_type, name, _id) in enumerate(self.inventory()):
             if (_type, name) in dedup:
                 continue
             dedup.add((_type, name))
 
-            if i == 0:
+            if i == 0 and init_dir:
+                share_init(init_dir, root)
+            elif i == 0:
                 rc = run_cmd(["terraform", "init"], self.logger, root)
                 if rc != 0:
                     exit(rc)
@@ -146,32 +441,258 @@ class BaseResource(metaclass=ABCMeta):
             # import is slow, avoid this if resource exists in state file and no need to override
             if not override and "{0}.{1}".format(_type, name) in existing:
                 continue
-            if isinstance(_id, list):
-                _id = _id[0]
-            _id = _id or name  # use name as Id if not provided
-            cmd = [
-                "terraform",
-                "import",
-                "-config={}".format(root),
-                "-state-out={}".format(state_file),
-                "{0}.{1}".format(_type, name),
-                _id,
-            ]
-            rc = run_cmd(cmd, self.logger, root)
-            if rc != 0:
-                failed.append(" ".join(cmd))
+            address = "{0}.{1}".format(_type, name)
+            _id = self.import_id(name, _id)
+            one = self.build_state(_type, name, _id)
+            if one:
+                built.append(one)
+            else:
+                pending.append((address, _id))
+
+        journal.append(
+            "start",
+            resource=type(self).__name__,
+            addresses=[resource_address(_) for _ in built] + [_[0] for _ in pending],
+        )
+        if built:
+            self.logger.info("build state of {} resources".format(len(built)))
+            write_state(
+                state_file,
+                merge_states(read_state(state_file), [dict(resources=built)]),
+            )
+            for one in built:
+                journal.append(
+                    "import",
+                    resource=type(self).__name__,
+                    address=resource_address(one),
+                    ok=True,
+                    method="build",
+                )
+
+        if import_blocks and pending:
+            if self.import_with_blocks(root, state_file, pending):
+                for address, _id in pending:
+                    journal.append(
+                        "import",
+                        resource=type(self).__name__,
+                        address=address,
+                        id=_id,
+                        ok=True,
+                        method="blocks",
+                    )
+                pending = []
+            else:
+                self.logger.info("fall back to import resources one by one")
+        if import_workers > 1 and len(pending) > 1:
+            failures = self.import_sharded(
+                root, state_file, pending, import_workers, journal, import_retries
+            )
+        else:
+            failures = self.import_resources(
+                root, root, state_file, pending, journal, import_retries
+            )
+        save_failures(root, type(self).__name__, failures)
+        failed = [_["command"] for _ in failures]
         if failed:
             self.logger.error("=" * 20 + __name__ + " LOAD FAILURE" + "=" * 20)
             self.logger.error("\n".join(["", *failed]))
             self.logger.error("=" * 20 + __name__ + " LOAD FAILURE" + "=" * 20)
+        return failed
+
+    def build_state(self, _type, name, _id):
+        """build state of a resource from raw records if `synthesize_state`,
+        instead of importing it with terraform
+
+        :return: dict of the state resource, or None to import it
+        """
+        if not self.synthesize_state:
+            return None
+        try:
+            return build_state(self, _type, name, _id)
+        except Exception as ex:
+            self.logger.warning(
+                "fail to build state of {}.{}, import it instead: {}".format(
+                    _type, name, ex
+                )
+            )
+            return None
+
+    def import_resources(
+        self, root, cwd, state_file, pending, journal=None, import_retries=0
+    ):
+        """import resources one by one into a state file. Transient failures,
+        such as throttling, are retried in later passes with jittered backoff,
+        while permanent ones, such as not found, are given up at once.
 
-    def sync_tfstate(self, root, tf_file="main.tf", state_file="terraform.tfstate"):
+        :param root: directory of terraform configuration
+        :param cwd: working directory to run `terraform import` in
+        :param state_file: state file to import into
+        :param pending: list of (address, id) to import
+        :param journal: `Journal` to record each import into
+        :param import_retries: max passes to retry transient failures
+        :return: list of failures, as dict of address, id, kind, transient,
+            attempts, command and error
+        """
+        failures = []
+        attempt = 0
+        while pending:
+            if attempt:
+                delay = backoff_delay(attempt)
+                self.logger.info(
+                    "retry {} failed imports in {:.1f}s".format(len(pending), delay)
+                )
+                time.sleep(delay)
+            retrying = []
+            for address, _id in pending:
+                started = time.time()
+                cmd = [
+                    "terraform",
+                    "import",
+                    "-config={}".format(root),
+                    "-state-out={}".format(state_file),
+                    address,
+                    _id,
+                ]
+                errors = []
+                rc = run_cmd(cmd, self.logger, cwd, errors=errors)
+                kind, transient = None, False
+                if rc != 0:
+                    kind, transient = classify_failure("".join(errors))
+                if journal:
+                    journal.append(
+                        "import",
+                        resource=type(self).__name__,
+                        address=address,
+                        id=_id,
+                        ok=rc == 0,
+                        kind=kind,
+                        attempt=attempt + 1,
+                        elapsed=time.time() - started,
+                        method="import",
+                    )
+                if rc == 0:
+                    continue
+                if transient and attempt < import_retries:
+                    retrying.append((address, _id))
+                else:
+                    failures.append(
+                        dict(
+                            address=address,
+                            id=_id,
+                            kind=kind,
+                            transient=transient,
+                            attempts=attempt + 1,
+                            command=" ".join(cmd),
+                            error="".join(errors)[-2000:],
+                        )
+                    )
+            pending = retrying
+            attempt += 1
+        return failures
+
+    def import_sharded(
+        self, root, state_file, pending, import_workers, journal=None, import_retries=0
+    ):
+        """import resources by several workers, each worker imports into a shard
+        state in its own working directory, so that they never wait for the lock
+        of each other. Shards are merged into state_file when all are done.
+
+        :param root: directory of terraform configuration, which is initialized
+        :param state_file: state file to merge imported resources into
+        :param pending: list of (address, id) to import
+        :param import_workers: number of workers
+        :param journal: `Journal` to record each import into
+        :param import_retries: max passes to retry transient failures
+        :return: list of failures as returned by `import_resources`
+        """
+        shards_dir = path.join(root, META_DIR, "shards", type(self).__name__)
+        shards = []
+        for k in range(min(import_workers, len(pending))):
+            cwd = path.join(shards_dir, str(k))
+            share_init(root, cwd)
+            shard_file = path.join(cwd, "terraform.tfstate")
+            write_state(shard_file, empty_state())
+            shards.append((cwd, shard_file, pending[k::import_workers]))
+        self.logger.info(
+            "import {} resources into {} shards".format(len(pending), len(shards))
+        )
+        with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+            futures = [
+                executor.submit(
+                    self.import_resources,
+                    root,
+                    cwd,
+                    shard_file,
+                    items,
+                    journal,
+                    import_retries,
+                )
+                for cwd, shard_file, items in shards
+            ]
+            failures = [one for _ in futures for one in _.result()]
+        self.merge_shards(state_file, shards_dir)
+        return failures
+
+    def merge_shards(self, state_file, shards_dir):
+        """merge shard states into state_file, and remove the shards
+
+        :param state_file: state file to merge into
+        :param shards_dir: directory of shard working directories
+        """
+        shard_files = [
+            path.join(shards_dir, _, "terraform.tfstate")
+            for _ in sorted(listdir(shards_dir))
+            if path.exists(path.join(shards_dir, _, "terraform.tfstate"))
+        ]
+        write_state(
+            state_file,
+            merge_states(read_state(state_file), [read_state(_) for _ in shard_files]),
+        )
+        shutil.rmtree(shards_dir)
+
+    def import_with_blocks(self, root, state_file, pending):
+        """import resources with one terraform plan and apply of import blocks.
+        It runs in a directory without resource configuration, which is generated
+        by terraform, into an empty state, as resources already in state_file
+        have no configuration there and would be planned to delete. The state
+        is merged into state_file only if all are imported.
+
+        :param root: directory of terraform configuration, which is initialized
+        :param state_file: state file to import into
+        :param pending: list of (address, id) to import
+        :return: whether all resources are imported
+        """
+        cwd = path.join(root, META_DIR, "imports", type(self).__name__)
+        share_init(root, cwd)
+        tf_template = self.my_jinja_env().get_template("tf.j2")
+        with open(path.join(cwd, "main.tf"), "wt") as fd:
+            fd.write(tf_template.render(instances=[], **self.provider_config()))
+        scratch_file = path.join(cwd, "terraform.tfstate")
+        write_state(scratch_file, empty_state())
+        try:
+            imported = import_with_blocks(
+                cwd, pending, self.logger, generate_config=True
+            )
+            if imported:
+                write_state(
+                    state_file,
+                    merge_states(read_state(state_file), [read_state(scratch_file)]),
+                )
+            return imported
+        finally:
+            shutil.rmtree(cwd)
+
+    def sync_tfstate(
+        self, root, tf_file="main.tf", state_file="terraform.tfstate", incremental=False
+    ):
         """sync resource configuration from a state_file,
            to keep current resource sync to currently deployed state
 
         :param root: root directory to put tf file into, default to pwd
         :param tf_file: terraform tf file to generate
         :param state_file: terraform state file with the lastest resource state
+        :param incremental: whether to render configuration only for resources
+            changed since previous sync
         """
         if not root:
             root = path.curdir
@@ -186,8 +707,10 @@ class BaseResource(metaclass=ABCMeta):
 
         # all resources that need to update
         pending = OrderedDict()
-        for t, n, _ in self.list_all():
+        ids = dict()
+        for t, n, _id in self.inventory():
             pending[(t, n)] = dict()
+            ids[(t, n)] = self.import_id(n, _id)
 
         # fill in attributes from state
         for item in resources:
@@ -196,9 +719,15 @@ class BaseResource(metaclass=ABCMeta):
             _name, _type = item["name"], item["type"]
             pending[(_type, _name)] = item["instances"][0]["attributes"]
 
-        instances = []
+        previous = load_manifest(root, type(self).__name__) if incremental else dict()
+        manifest = dict()
+        block_template = self.my_jinja_env().get_template("resource.j2")
         for (t, n,) in pending:
+            original = copy.deepcopy(pending[(t, n)])
             raw = self.amend_attributes(t, n, pending[(t, n)])
+            # configuration of amended or ignored attributes may not match the
+            # state, such resources are refreshed by fast verify
+            touched = raw != original
             inst_attrs = []
             for k in sorted(raw.keys()):
                 # skip ignored attributes: ignore some Empty attributes
@@ -206,12 +735,33 @@ class BaseResource(metaclass=ABCMeta):
                 # such as access_logs in alb with "enabled" as "false"
                 v = raw[k]
                 if self.ignore_attrbute(k, v) or not not_empty(v):
+                    computed = COMPUTED_ATTRIBUTES + list(self.computed_attributes)
+                    if k not in computed and not_empty(v):
+                        touched = True
                     continue
                 inst_attrs.append(Attribute(name=k, value=v))
-            instances.append((t, n, inst_attrs))
+            address = "{}.{}".format(t, n)
+            digest = hashlib.sha1(
+                json.dumps(inst_attrs, sort_keys=True, default=str).encode()
+            ).hexdigest()
+            entry = previous.get(address)
+            if not entry or entry["digest"] != digest:
+                entry = dict(
+                    digest=digest,
+                    block=block_template.render(_type=t, _name=n, attrs=inst_attrs),
+                )
+            manifest[address] = dict(entry, id=ids.get((t, n)), touched=touched)
 
+        save_manifest(root, type(self).__name__, manifest)
+        if incremental and manifest == previous and path.exists(tf_file):
+            self.logger.info("no change of {} since previous sync".format(tf_file))
+            return
         tf_template = self.my_jinja_env().get_template("tf.j2")
-        data = tf_template.render(instances=instances)
+        data = tf_template.render(
+            instances=[],
+            blocks=[_["block"] for _ in manifest.values()],
+            **self.provider_config()
+        )
         with open(tf_file, "wt") as fd:
             fd.truncate()
             fd.write(data)
@@ -0,0 +1,227 @@
+import json
+from datetime import datetime, timezone
+
+# resource type -> (function to build state attributes, schema version)
+STATE_BUILDERS = dict()
+
+# fully qualified provider address of resources in state, as written by
+# terraform 0.13 and later
+PROVIDER = 'provider["registry.terraform.io/hashicorp/aws"]'
+
+
+def state_builder(_type, schema_version=0):
+    """register a function to build state attributes of a resource type from the
+    raw records of `list_all`, instead of running `terraform import` for it.
+
+    The function is called with (res, name, id) as listed by `list_all`, and
+    returns a dict of attributes, or None to fall back to `terraform import`.
+    """
+
+    def decorator(func):
+        STATE_BUILDERS[_type] = (func, schema_version)
+        return func
+
+    return decorator
+
+
+def build_state(res, _type, name, _id):
+    """build a v4 state resource without `terraform import`
+
+    :param res: resource which listed this one, with its raw records
+    :param _type: resource type
+    :param name: resource name
+    :param _id: import id of the resource
+    :return: dict of the state resource, or None if it can not be built
+    """
+    if _type not in STATE_BUILDERS:
+        return None
+    func, schema_version = STATE_BUILDERS[_type]
+    attributes = func(res, name, _id)
+    if attributes is None:
+        return None
+    return dict(
+        mode="managed",
+        type=_type,
+        name=name,
+        provider=PROVIDER,
+        instances=[
+            dict(schema_version=schema_version, attributes=attributes, private=None)
+        ],
+    )
+
+
+def find_record(res, operation, key, value):
+    """the raw record of an API operation with `key` equal to `value`"""
+    for record in res.records.get(operation, []):
+        if record.get(key) == value:
+            return record
+    return None
+
+
+def rfc3339(value):
+    """a timestamp of a raw record in RFC3339 as written by `terraform import`,
+    such as `2020-01-01T00:00:00Z`
+    """
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+    return value or ""
+
+
+def tags_of(record, key="Tags"):
+    """tags of a raw record as a dict"""
+    return {_["Key"]: _["Value"] for _ in record.get(key) or []}
+
+
+def policy_of(document):
+    """policy document as json text, it is decoded by boto3 in some APIs"""
+    if document is None or isinstance(document, str):
+        return document
+    return json.dumps(document)
+
+
+@state_builder("aws_eip")
+def eip_attributes(res, name, _id):
+    one = find_record(res, "describe_addresses", "AllocationId", _id)
+    if one is None:
+        return None
+    return dict(
+        id=_id,
+        allocation_id=None,
+        associate_with_private_ip=None,
+        association_id=one.get("AssociationId"),
+        customer_owned_ip=one.get("CustomerOwnedIp"),
+        customer_owned_ipv4_pool=one.get("CustomerOwnedIpv4Pool"),
+        domain=one.get("Domain"),
+        instance=one.get("InstanceId", ""),
+        network_interface=one.get("NetworkInterfaceId", ""),
+        private_dns=None,
+        private_ip=one.get("PrivateIpAddress", ""),
+        public_dns=None,
+        public_ip=one.get("PublicIp"),
+        public_ipv4_pool=one.get("PublicIpv4Pool"),
+        tags=tags_of(one),
+        timeouts=None,
+        vpc=one.get("Domain") == "vpc",
+    )
+
+
+@state_builder("aws_cloudwatch_metric_alarm", schema_version=1)
+def alarm_attributes(res, name, _id):
+    one = find_record(res, "describe_alarms", "AlarmName", _id)
+    if one is None or one.get("Metrics"):
+        return None  # metric math alarms are left to `terraform import`
+    return dict(
+        id=_id,
+        actions_enabled=one.get("ActionsEnabled", True),
+        alarm_actions=one.get("AlarmActions", []),
+        alarm_description=one.get("AlarmDescription", ""),
+        alarm_name=_id,
+        arn=one.get("AlarmArn"),
+        comparison_operator=one.get("ComparisonOperator"),
+        datapoints_to_alarm=one.get("DatapointsToAlarm", 0),
+        dimensions={_["Name"]: _["Value"] for _ in one.get("Dimensions", [])},
+        evaluate_low_sample_count_percentiles=one.get(
+            "EvaluateLowSampleCountPercentile", ""
+        ),
+        evaluation_periods=one.get("EvaluationPeriods"),
+        extended_statistic=one.get("ExtendedStatistic", ""),
+        insufficient_data_actions=one.get("InsufficientDataActions", []),
+        metric_name=one.get("MetricName"),
+        metric_query=[],
+        namespace=one.get("Namespace"),
+        ok_actions=one.get("OKActions", []),
+        period=one.get("Period"),
+        statistic=one.get("Statistic", ""),
+        tags=dict(),
+        threshold=one.get("Threshold"),
+        threshold_metric_id="",
+        treat_missing_data=one.get("TreatMissingData", "missing"),
+        unit=one.get("Unit", ""),
+    )
+
+
+@state_builder("aws_iam_role")
+def role_attributes(res, name, _id):
+    one = find_record(res, "get_account_authorization_details", "RoleName", _id)
+    if one is None:
+        return None
+    # description and max session duration are not in the authorization
+    # details, they are one call away
+    one = dict(one, **res.client("iam").get_role(RoleName=_id)["Role"])
+    boundary = one.get("PermissionsBoundary") or dict()
+    return dict(
+        id=_id,
+        arn=one["Arn"],
+        assume_role_policy=policy_of(one.get("AssumeRolePolicyDocument")),
+        create_date=rfc3339(one.get("CreateDate")),
+        description=one.get("Description", ""),
+        force_detach_policies=False,
+        max_session_duration=one.get("MaxSessionDuration", 3600),
+        name=_id,
+        name_prefix=None,
+        path=one.get("Path", "/"),
+        permissions_boundary=boundary.get("PermissionsBoundaryArn"),
+        tags=tags_of(one),
+        unique_id=one.get("RoleId"),
+    )
+
+
+@state_builder("aws_sqs_queue")
+def queue_attributes(res, name, _id):
+    # `list_queues` only returns urls, attributes are one call away
+    attrs = res.client("sqs").get_queue_attributes(
+        QueueUrl=_id, AttributeNames=["All"]
+    )["Attributes"]
+    tags = res.client("sqs").list_queue_tags(QueueUrl=_id).get("Tags", dict())
+    return dict(
+        id=_id,
+        arn=attrs.get("QueueArn"),
+        content_based_deduplication=attrs.get("ContentBasedDeduplication") == "true",
+        delay_seconds=int(attrs.get("DelaySeconds", 0)),
+        fifo_queue=attrs.get("FifoQueue") == "true",
+        kms_data_key_reuse_period_seconds=int(
+            attrs.get("KmsDataKeyReusePeriodSeconds", 300)
+        ),
+        kms_master_key_id=attrs.get("KmsMasterKeyId", ""),
+        max_message_size=int(attrs.get("MaximumMessageSize", 262144)),
+        message_retention_seconds=int(attrs.get("MessageRetentionPeriod", 345600)),
+        name=name,
+        name_prefix=None,
+        policy=attrs.get("Policy", ""),
+        receive_wait_time_seconds=int(attrs.get("ReceiveMessageWaitTimeSeconds", 0)),
+        redrive_policy=attrs.get("RedrivePolicy", ""),
+        tags=tags,
+        visibility_timeout_seconds=int(attrs.get("VisibilityTimeout", 30)),
+    )
+
+
+@state_builder("aws_sns_topic")
+def topic_attributes(res, name, _id):
+    # `list_topics` only returns arns, attributes are one call away
+    attrs = res.client("sns").get_topic_attributes(TopicArn=_id)["Attributes"]
+    tags = res.client("sns").list_tags_for_resource(ResourceArn=_id).get("Tags")
+    return dict(
+        id=_id,
+        application_failure_feedback_role_arn="",
+        application_success_feedback_role_arn="",
+        application_success_feedback_sample_rate=0,
+        arn=_id,
+        delivery_policy=attrs.get("DeliveryPolicy", ""),
+        display_name=attrs.get("DisplayName", ""),
+        http_failure_feedback_role_arn="",
+        http_success_feedback_role_arn="",
+        http_success_feedback_sample_rate=0,
+        kms_master_key_id=attrs.get("KmsMasterKeyId", ""),
+        lambda_failure_feedback_role_arn="",
+        lambda_success_feedback_role_arn="",
+        lambda_success_feedback_sample_rate=0,
+        name=name,
+        name_prefix=None,
+        policy=attrs.get("Policy", ""),
+        sqs_failure_feedback_role_arn="",
+        sqs_success_feedback_role_arn="",
+        sqs_success_feedback_sample_rate=0,
+        tags=tags_of(dict(Tags=tags)),
+    )
@@ -0,0 +1,138 @@
+import boto3
+import botocore.session
+from os import path
+from threading import Lock
+from botocore.config import Config
+from botocore.credentials import (
+    AssumeRoleCredentialFetcher,
+    DeferredRefreshableCredentials,
+)
+from botocore.utils import JSONFileCache
+
+from .ratelimit import RateLimiter
+
+# assumed role credentials are cached here to be shared by worker processes
+STS_CACHE_DIR = path.expanduser(path.join("~", ".tfcli", "cache", "sts"))
+
+
+class ClientPool:
+    """Process-wide pool of boto3 sessions and clients, keyed by
+    (profile, role_arn, region) and (profile, role_arn, region, service).
+
+    Sessions are not thread safe, so sessions and clients are only created under
+    a lock, while the created clients can be shared by worker threads.
+    All API calls of the clients are limited by one `RateLimiter`.
+    """
+
+    def __init__(self, max_pool_connections=50, tcp_keepalive=True, max_attempts=10):
+        self._lock = Lock()
+        self._sessions = dict()
+        self._clients = dict()
+        self._accounts = dict()
+        self.limiter = RateLimiter()
+        self.configure(max_pool_connections, tcp_keepalive, max_attempts)
+
+    def configure(
+        self,
+        max_pool_connections=None,
+        tcp_keepalive=None,
+        max_attempts=None,
+        limiter=None,
+    ):
+        """change connection settings of clients, created clients are dropped
+
+        :param max_pool_connections: max number of kept-alive connections of a client
+        :param tcp_keepalive: whether to enable TCP keep-alive of connections
+        :param max_attempts: max attempts of an API call, including retries of
+            throttled ones
+        :param limiter: `RateLimiter` to limit API calls with
+        """
+        with self._lock:
+            if max_pool_connections is not None:
+                self.max_pool_connections = max_pool_connections
+            if tcp_keepalive is not None:
+                self.tcp_keepalive = tcp_keepalive
+            if max_attempts is not None:
+                self.max_attempts = max_attempts
+            if limiter is not None:
+                self.limiter = limiter
+            self._clients.clear()
+
+    def config(self):
+        """botocore config for clients of this pool"""
+        return Config(
+            max_pool_connections=self.max_pool_connections,
+            tcp_keepalive=self.tcp_keepalive,
+            retries=dict(max_attempts=self.max_attempts, mode="standard"),
+        )
+
+    def session(self, profile=None, region=None, role_arn=None):
+        """get the shared session for a profile and region
+
+        :param profile: AWS profile name, default to the one of environment
+        :param region: AWS region name, default to the one of environment
+        :param role_arn: role to assume with credentials of the profile
+        """
+        with self._lock:
+            return self._session(profile, region, role_arn)
+
+    def _session(self, profile, region, role_arn):
+        key = (profile, role_arn, region)
+        if key not in self._sessions:
+            session = boto3.Session(profile_name=profile, region_name=region)
+            if role_arn:
+                session = self._assume_role(session, role_arn)
+            self._sessions[key] = session
+        return self._sessions[key]
+
+    def _assume_role(self, source, role_arn):
+        """session with credentials of an assumed role, which are cached on disk
+        and refreshed before they expire
+        """
+        fetcher = AssumeRoleCredentialFetcher(
+            client_creator=source._session.create_client,
+            source_credentials=source.get_credentials(),
+            role_arn=role_arn,
+            extra_args=dict(RoleSessionName="tfcli"),
+            cache=JSONFileCache(STS_CACHE_DIR),
+        )
+        core = botocore.session.Session()
+        core._credentials = DeferredRefreshableCredentials(
+            refresh_using=fetcher.fetch_credentials, method="assume-role"
+        )
+        return boto3.Session(botocore_session=core, region_name=source.region_name)
+
+    def client(self, service, profile=None, region=None, role_arn=None):
+        """get the shared client of a service for a profile and region
+
+        :param service: AWS service name, such as `ec2`
+        :param profile: AWS profile name, default to the one of environment
+        :param region: AWS region name, default to the one of environment
+        :param role_arn: role to assume with credentials of the profile
+        """
+        key = (profile, role_arn, region, service)
+        with self._lock:
+            if key not in self._clients:
+                session = self._session(profile, region, role_arn)
+                client = session.client(service, config=self.config())
+                self.limiter.register(client, service)
+                self._clients[key] = client
+            return self._clients[key]
+
+    def account_id(self, profile=None, role_arn=None):
+        """id of the AWS account that a profile or role belongs to"""
+        key = (profile, role_arn)
+        if key not in self._accounts:
+            sts = self.client("sts", profile, role_arn=role_arn)
+            self._accounts[key] = sts.get_caller_identity()["Account"]
+        return self._accounts[key]
+
+    def clear(self):
+        """drop all sessions and clients of this pool"""
+        with self._lock:
+            self._sessions.clear()
+            self._clients.clear()
+            self._accounts.clear()
+
+
+CLIENT_POOL = ClientPool()
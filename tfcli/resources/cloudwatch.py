@@ -6,8 +6,8 @@ class Cwa(BaseResource):
     """ Cloud watch alert resource to generate from current region
     """
 
-    def __init__(self, logger=None):
-        super().__init__(logger)
+    def __init__(self, logger=None, **kwargs):
+        super().__init__(logger, **kwargs)
 
     @classmethod
     def ignore_attrbute(cls, key, value):
@@ -28,8 +28,8 @@ class Cwa(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        cw = self.session.client("cloudwatch")
-        alarms = cw.describe_alarms()["MetricAlarms"]
+        cw = self.client("cloudwatch")
+        alarms = self.paginate(cw, "describe_alarms", "MetricAlarms")
         for one in alarms:
             name = one["AlarmName"]
             yield "aws_cloudwatch_metric_alarm", normalize_identity(name), name
@@ -7,8 +7,25 @@ class Ec2(BaseResource):
     """ aws_instance to generate from current region
     """
 
-    def __init__(self, logger=None, indexes=None):
-        super().__init__(logger)
+    supported_filters = (
+        "tag:",
+        "tag-key",
+        "vpc-id",
+        "subnet-id",
+        "instance-id",
+        "instance-type",
+        "availability-zone",
+    )
+    computed_attributes = (
+        "primary_network_interface_id",
+        "private_dns",
+        "instance_state",
+        "public_ip",
+        "public_dns",
+    )
+
+    def __init__(self, logger=None, indexes=None, **kwargs):
+        super().__init__(logger, **kwargs)
         self.indexes = indexes
 
     def amend_attributes(self, _type, _name, attributes: dict):
@@ -29,13 +46,9 @@ class Ec2(BaseResource):
 
     @classmethod
     def ignore_attrbute(cls, key, value):
-        if key in ["id", "owner_id", "arn", "unique_id"] + [
-            "primary_network_interface_id",
-            "private_dns",
-            "instance_state",
-            "public_ip",
-            "public_dns",
-        ]:
+        if key in ["id", "owner_id", "arn", "unique_id"] + list(
+            cls.computed_attributes
+        ):
             return True
         return False
 
@@ -52,10 +65,22 @@ class Ec2(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        ec2 = self.session.client("ec2")
-        items = ec2.describe_instances()["Reservations"]
+        ec2 = self.client("ec2")
+        # NOTE: terminated instances could not be imported
+        filters = self.api_filters(
+            instance_state_name=[
+                "pending",
+                "running",
+                "shutting-down",
+                "stopping",
+                "stopped",
+            ]
+        )
+        items = self.paginate(
+            ec2, "describe_instances", "Reservations[].Instances[]", Filters=filters
+        )
         asgs = defaultdict(list)
-        for i, one in enumerate([_ for sub in items for _ in sub["Instances"]]):
+        for i, one in enumerate(items):
             aid = one["InstanceId"]
             name_tag = self.get_resource_name_from_tags(one["Tags"])
             if name_tag:
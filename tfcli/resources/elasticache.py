@@ -5,8 +5,10 @@ class Ecc(BaseResource):
     """ elasticache clusterresource to generate from current region
     """
 
-    def __init__(self, logger=None):
-        super().__init__(logger)
+    computed_attributes = ("cache_nodes", "cluster_address", "configuration_endpoint")
+
+    def __init__(self, logger=None, **kwargs):
+        super().__init__(logger, **kwargs)
 
     @classmethod
     def ignore_attrbute(cls, key, value):
@@ -33,12 +35,12 @@ class Ecc(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        ecc = self.session.client("elasticache")
-        items = ecc.describe_cache_clusters()["CacheClusters"]
+        ecc = self.client("elasticache")
+        items = self.paginate(ecc, "describe_cache_clusters", "CacheClusters")
         for one in items:
             _id = one["CacheClusterId"]
             yield "aws_elasticache_cluster", _id, _id
-        items = ecc.describe_cache_subnet_groups()["CacheSubnetGroups"]
+        items = self.paginate(ecc, "describe_cache_subnet_groups", "CacheSubnetGroups")
         for one in items:
             _name = one["CacheSubnetGroupName"]
             yield "aws_elasticache_subnet_group", _name, _name
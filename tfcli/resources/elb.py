@@ -1,17 +1,18 @@
 from .base import BaseResource
-import jmespath
 from ..filters import normalize_identity, arn_lastpart
 
 
 class Elb(BaseResource):
     """elb resource to generate from current region"""
 
-    def __init__(self, logger=None):
-        super().__init__(logger)
+    computed_attributes = ("arn_suffix", "zone_id", "dns_name", "vpc_id")
+
+    def __init__(self, logger=None, **kwargs):
+        super().__init__(logger, **kwargs)
 
     @classmethod
     def ignore_attrbute(cls, key, value):
-        if key in ["arn", "arn_suffix", "zone_id", "dns_name", "vpc_id", "id"]:
+        if key in ["arn", "id"] + list(cls.computed_attributes):
             return True
         if key == "access_logs" and not value[0]["enabled"]:
             return True
@@ -35,40 +36,54 @@ class Elb(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        elb = self.session.client("elbv2")
-        for name, arn in jmespath.search(
-            "LoadBalancers[*].[LoadBalancerName,LoadBalancerArn]",
-            elb.describe_load_balancers(),
+        elb = self.client("elbv2")
+        for rows in self.fan_out(
+            lambda lb: list(self._list_load_balancer(elb, *lb)),
+            self.paginate(
+                elb,
+                "describe_load_balancers",
+                "LoadBalancers[*].[LoadBalancerName,LoadBalancerArn]",
+            ),
         ):
-            yield "aws_alb", name, arn
-            for larn, port, proto in jmespath.search(
-                "Listeners[*].[ListenerArn,Port,Protocol]",
-                elb.describe_listeners(LoadBalancerArn=arn),
-            ):
-                yield "aws_alb_listener", "{}-{}-{}".format(name, proto, port), larn
-                if proto == "HTTPS":
-                    for cert in jmespath.search(
-                        "Certificates[*].CertificateArn",
-                        elb.describe_listener_certificates(ListenerArn=larn),
-                    ):
-                        yield (
-                            "aws_lb_listener_certificate",
-                            normalize_identity(
-                                "{}_{}".format(name, arn_lastpart(cert)),
-                            ),
-                            "{}_{}".format(larn, cert),
-                        )
-                for rarn in jmespath.search(
-                    "Rules[*].RuleArn", elb.describe_rules(ListenerArn=larn)
+            yield from rows
+
+    def _list_load_balancer(self, elb, name, arn):
+        """list one load balancer with its listeners, rules and target groups"""
+        yield "aws_alb", name, arn
+        for larn, port, proto in self.paginate(
+            elb,
+            "describe_listeners",
+            "Listeners[*].[ListenerArn,Port,Protocol]",
+            LoadBalancerArn=arn,
+        ):
+            yield "aws_alb_listener", "{}-{}-{}".format(name, proto, port), larn
+            if proto == "HTTPS":
+                for cert in self.paginate(
+                    elb,
+                    "describe_listener_certificates",
+                    "Certificates[*].CertificateArn",
+                    ListenerArn=larn,
                 ):
                     yield (
-                        "aws_lb_listener_rule",
-                        "{}-{}-{}_{}".format(name, proto, port, arn_lastpart(rarn)),
-                        rarn,
+                        "aws_lb_listener_certificate",
+                        normalize_identity(
+                            "{}_{}".format(name, arn_lastpart(cert)),
+                        ),
+                        "{}_{}".format(larn, cert),
                     )
-
-            for tarn, tname in jmespath.search(
-                "TargetGroups[*].[TargetGroupArn,TargetGroupName]",
-                elb.describe_target_groups(LoadBalancerArn=arn),
+            for rarn in self.paginate(
+                elb, "describe_rules", "Rules[*].RuleArn", ListenerArn=larn
             ):
-                yield "aws_lb_target_group", "{}_{}".format(name, tname), tarn
+                yield (
+                    "aws_lb_listener_rule",
+                    "{}-{}-{}_{}".format(name, proto, port, arn_lastpart(rarn)),
+                    rarn,
+                )
+
+        for tarn, tname in self.paginate(
+            elb,
+            "describe_target_groups",
+            "TargetGroups[*].[TargetGroupArn,TargetGroupName]",
+            LoadBalancerArn=arn,
+        ):
+            yield "aws_lb_target_group", "{}_{}".format(name, tname), tarn
@@ -5,8 +5,10 @@ class Emr(BaseResource):
     """ aws_emr_cluster to generate from current region
     """
 
-    def __init__(self, logger=None, indexes=None):
-        super().__init__(logger)
+    computed_attributes = ("cluster_state", "master_public_dns")
+
+    def __init__(self, logger=None, indexes=None, **kwargs):
+        super().__init__(logger, **kwargs)
         self.indexes = indexes
 
     @classmethod
@@ -38,8 +40,8 @@ class Emr(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        emr = self.session.client("emr")
-        items = emr.list_clusters()["Clusters"]
+        emr = self.client("emr")
+        items = self.paginate(emr, "list_clusters", "Clusters")
         for i, one in enumerate(items):
             id_ = one["Id"]
             name_ = one["Name"]
@@ -1,12 +1,70 @@
+from collections import defaultdict
+from threading import Lock
+
 from .base import BaseResource
 from ..filters import normalize_identity
 
 
+class IamCatalog:
+    """In-memory index of IAM entities of an account, loaded with a few pages of
+    `get_account_authorization_details` instead of several calls per entity.
+    It is shared by all IAM resources of a run.
+    """
+
+    _catalogs = dict()
+    _lock = Lock()
+
+    def __init__(self):
+        self.groups = []
+        self.roles = []
+        self.users = []
+        self.local_policies = dict()  # local managed policy name -> arn
+        self.group_members = defaultdict(list)  # group name -> user names
+
+    def add_page(self, page):
+        """index one page of `get_account_authorization_details` response"""
+        self.groups.extend(page.get("GroupDetailList", []))
+        self.roles.extend(page.get("RoleDetailList", []))
+        self.users.extend(page.get("UserDetailList", []))
+        for user in page.get("UserDetailList", []):
+            for group_name in user.get("GroupList", []):
+                self.group_members[group_name].append(user["UserName"])
+        for policy in page.get("Policies", []):
+            self.local_policies[policy["PolicyName"]] = policy["Arn"]
+
+    @classmethod
+    def load(cls, res: BaseResource):
+        """get the catalog of the account `res` is working with, load it once
+
+        :param res: IAM resource asking for the catalog
+        """
+        key = (res.profile, res.role_arn)
+        with cls._lock:
+            if key not in cls._catalogs:
+                catalog = cls()
+                iam = res.client("iam")
+                pages = iam.get_paginator("get_account_authorization_details")
+                for page in pages.paginate(
+                    Filter=["User", "Group", "Role", "LocalManagedPolicy"]
+                ):
+                    catalog.add_page(page)
+                cls._catalogs[key] = catalog
+            return cls._catalogs[key]
+
+    @classmethod
+    def invalidate(cls):
+        """drop all loaded catalogs"""
+        with cls._lock:
+            cls._catalogs.clear()
+
+
 class Group(BaseResource):
     """IAM Group , group membership and group policy to generate from current region"""
 
-    def __init__(self, logger=None):
-        super().__init__(logger)
+    is_global = True
+
+    def __init__(self, logger=None, **kwargs):
+        super().__init__(logger, **kwargs)
 
     @classmethod
     def ignore_attrbute(cls, key, value):
@@ -23,9 +81,7 @@ class Group(BaseResource):
         if _type == "aws_iam_group_membership":
             attributes["name"] = "{}-group-membership".format(_name)
             attributes["group"] = _name
-            iam = self.session.client("iam")
-            users = iam.get_group(GroupName=_name)["Users"]
-            attributes["users"] = [_["UserName"] for _ in users]
+            attributes["users"] = list(IamCatalog.load(self).group_members[_name])
         return attributes
 
     @classmethod
@@ -37,21 +93,19 @@ class Group(BaseResource):
             "aws_iam_group_membership",
         ]
 
+    @classmethod
+    def invalidate_inventory(cls):
+        super().invalidate_inventory()
+        IamCatalog.invalidate()
+
     def list_all(self):
         """list all such kind of resources from AWS
 
         :return: list of tupe for a resource (type, name, id)
         """
-        iam = self.session.client("iam")
-        # filtered policy list to exclude AWS managed policies
-        local_policies = set()
-        ret = iam.list_policies(Scope="Local", MaxItems=1000)
-        local_policies.update([_["PolicyName"] for _ in ret["Policies"]])
-        while ret["IsTruncated"]:
-            ret = iam.list_policies(Scope="Local", MaxItems=1000, Marker=ret["Marker"])
-            local_policies.update([_["PolicyName"] for _ in ret["Policies"]])
-        groups = iam.list_groups()["Groups"]
-        for one in groups:
+        catalog = IamCatalog.load(self)
+        for one in catalog.groups:
+            self.record("get_account_authorization_details", one)
             group_name = one["GroupName"]
             yield "aws_iam_group", group_name, group_name
 
@@ -59,29 +113,30 @@ class Group(BaseResource):
             # yield "aws_iam_group_membership", group_name, group_name
 
             # list group policies
-            gps = iam.list_group_policies(GroupName=group_name)["PolicyNames"]
-            for gp in gps:
-                gp_name = normalize_identity("{}_{}".format(group_name, gp))
-                gp_id = "{}:{}".format(group_name, gp)
+            for gp in one.get("GroupPolicyList", []):
+                gp_name = normalize_identity(
+                    "{}_{}".format(group_name, gp["PolicyName"])
+                )
+                gp_id = "{}:{}".format(group_name, gp["PolicyName"])
                 yield "aws_iam_group_policy", gp_name, gp_id
-            for a in iam.list_attached_group_policies(GroupName=group_name)[
-                "AttachedPolicies"
-            ]:
+            for a in one.get("AttachedManagedPolicies", []):
                 aname, aarn = a["PolicyName"], a["PolicyArn"]
                 yield (
                     "aws_iam_group_policy_attachment",
                     "{}-{}".format(group_name, aname),
                     "{}/{}".format(group_name, aarn),
                 )
-                if aname in local_policies:
+                if aname in catalog.local_policies:
                     yield "aws_iam_policy", aname, aarn
 
 
 class Role(BaseResource):
     """IAM Role"""
 
-    def __init__(self, logger=None):
-        super().__init__(logger)
+    is_global = True
+
+    def __init__(self, logger=None, **kwargs):
+        super().__init__(logger, **kwargs)
 
     @classmethod
     def ignore_attrbute(cls, key, value):
@@ -98,7 +153,7 @@ class Role(BaseResource):
         # if _type == "aws_iam_group_membership":
         #     attributes["name"] = "{}-group-membership".format(_name)
         #     attributes["group"] = _name
-        #     iam = self.session.client("iam")
+        #     iam = self.client("iam")
         #     users = iam.get_group(GroupName=_name)["Users"]
         #     attributes["users"] = [_["UserName"] for _ in users]
         return attributes
@@ -113,42 +168,31 @@ class Role(BaseResource):
             "aws_iam_instance_profile",
         ]
 
+    @classmethod
+    def invalidate_inventory(cls):
+        super().invalidate_inventory()
+        IamCatalog.invalidate()
+
     def list_all(self):
         """list all such kind of resources from AWS
 
         :return: list of tupe for a resource (type, name, id)
         """
-        iam = self.session.client("iam")
-        # filtered policy list to exclude AWS managed policies
-        local_policies = set()
-        ret = iam.list_policies(Scope="Local", MaxItems=1000)
-        local_policies.update([_["PolicyName"] for _ in ret["Policies"]])
-        while ret["IsTruncated"]:
-            ret = iam.list_policies(Scope="Local", MaxItems=1000, Marker=ret["Marker"])
-            local_policies.update([_["PolicyName"] for _ in ret["Policies"]])
-
-        roles = []
-        ret = iam.list_roles(MaxItems=1000)
-        roles.extend(ret["Roles"])
-        while ret["IsTruncated"]:
-            ret = iam.list_roles(MaxItems=1000, Marker=ret.Marker)
-            roles.extend(ret["Roles"])
-        for one in roles:
+        catalog = IamCatalog.load(self)
+        for one in catalog.roles:
+            self.record("get_account_authorization_details", one)
             name = one["RoleName"]
             normalized_name = normalize_identity(name)
             yield "aws_iam_role", normalized_name, name
-            attached = iam.list_attached_role_policies(RoleName=name)
-            for a in attached["AttachedPolicies"]:
+            for a in one.get("AttachedManagedPolicies", []):
                 aname, aarn = a["PolicyName"], a["PolicyArn"]
                 yield (
                     "aws_iam_role_policy_attachment",
                     "{}-{}".format(normalized_name, aname),
                     "{}/{}".format(normalized_name, aarn),
                 )
-                if aname in local_policies:
+                if aname in catalog.local_policies:
                     yield "aws_iam_policy", aname, aarn
-            for a in iam.list_instance_profiles_for_role(RoleName=name)[
-                "InstanceProfiles"
-            ]:
+            for a in one.get("InstanceProfileList", []):
                 name = a["InstanceProfileName"]
                 yield "aws_iam_instance_profile", name, name
@@ -0,0 +1,124 @@
+import json
+import time
+import hashlib
+from os import path, replace, makedirs, walk
+from uuid import uuid4
+
+from .clients import CLIENT_POOL
+from ..filters import Attribute
+
+# inventory snapshots are saved as <INVENTORY_DIR>/<account>/<region>/<class>-<key>.json
+INVENTORY_DIR = path.expanduser(path.join("~", ".tfcli", "cache", "inventory"))
+
+
+class SnapshotEncoder(json.JSONEncoder):
+    """json encoder of inventory items and raw describe records"""
+
+    def iterencode(self, o, _one_shot=False):
+        return super().iterencode(self._tag(o), _one_shot)
+
+    def _tag(self, o):
+        # namedtuple would be encoded as a plain list without this
+        if isinstance(o, Attribute):
+            return {"__attribute__": [o.name, self._tag(o.value)]}
+        if isinstance(o, (list, tuple)):
+            return [self._tag(_) for _ in o]
+        if isinstance(o, dict):
+            return {k: self._tag(v) for k, v in o.items()}
+        return o
+
+    def default(self, o):
+        # such as datetime in describe records
+        return str(o)
+
+
+def _untag(o):
+    if "__attribute__" in o:
+        return Attribute(*o["__attribute__"])
+    return o
+
+
+def snapshot_path(res, root=None):
+    """path of the inventory snapshot of a resource
+
+    :param res: resource to get snapshot path for
+    :param root: root directory of all snapshots, default to `INVENTORY_DIR`
+    """
+    root = root or INVENTORY_DIR
+    indexes = getattr(res, "indexes", None)
+    key = repr((tuple(indexes) if indexes else None, sorted(res.filters.items())))
+    return path.join(
+        root,
+        CLIENT_POOL.account_id(res.profile, res.role_arn),
+        res.session.region_name or "global",
+        "{}-{}.json".format(
+            type(res).__name__, hashlib.sha1(key.encode()).hexdigest()[:8]
+        ),
+    )
+
+
+def save_snapshot(res, items, records, root=None):
+    """save inventory items and raw describe records of a resource
+
+    :param res: resource the inventory belongs to
+    :param items: list of tuple for a resource as returned by `list_all`
+    :param records: dict of API operation to raw records
+    :param root: root directory of all snapshots, default to `INVENTORY_DIR`
+    """
+    snapshot_file = snapshot_path(res, root)
+    if not path.exists(path.dirname(snapshot_file)):
+        makedirs(path.dirname(snapshot_file), exist_ok=True)
+    data = dict(
+        resource=type(res).__name__,
+        created=time.time(),
+        items=items,
+        records=records,
+    )
+    # write to a temp file first, other processes may read it at the same time
+    tmp_file = "{}.{}.tmp".format(snapshot_file, uuid4().hex)
+    with open(tmp_file, "wt") as fd:
+        json.dump(data, fd, cls=SnapshotEncoder)
+    replace(tmp_file, snapshot_file)
+    return snapshot_file
+
+
+def load_snapshot(res, ttl, root=None):
+    """load inventory of a resource if its snapshot is not older than ttl
+
+    :param res: resource to load inventory for
+    :param ttl: time to live of snapshot in seconds
+    :param root: root directory of all snapshots, default to `INVENTORY_DIR`
+    :return: tuple of (items, records), or None if there is no fresh snapshot
+    """
+    snapshot_file = snapshot_path(res, root)
+    if not path.exists(snapshot_file):
+        return None
+    with open(snapshot_file, "rt") as fd:
+        data = json.load(fd, object_hook=_untag)
+    if time.time() - data["created"] > ttl:
+        return None
+    return [tuple(_) for _ in data["items"]], data["records"]
+
+
+def list_snapshots(root=None):
+    """yield summary of all inventory snapshots
+
+    :param root: root directory of all snapshots, default to `INVENTORY_DIR`
+    """
+    root = root or INVENTORY_DIR
+    for current, _, files in sorted(walk(root)):
+        for one in sorted(files):
+            if not one.endswith(".json"):
+                continue
+            snapshot_file = path.join(current, one)
+            with open(snapshot_file, "rt") as fd:
+                data = json.load(fd, object_hook=_untag)
+            region_dir = path.dirname(snapshot_file)
+            yield dict(
+                account=path.basename(path.dirname(region_dir)),
+                region=path.basename(region_dir),
+                resource=data["resource"],
+                age=time.time() - data["created"],
+                items=[tuple(_) for _ in data["items"]],
+                path=snapshot_file,
+            )
@@ -0,0 +1,121 @@
+import json
+import time
+from os import path, makedirs, walk
+from threading import Lock
+
+from .manifest import META_DIR
+
+
+def journal_path(root):
+    """path of the import journal of an output directory
+
+    :param root: output directory of the resources
+    """
+    return path.join(root, META_DIR, "journal.jsonl")
+
+
+class Journal:
+    """Append-only journal of the imports of an output directory, one json
+    event per line:
+
+    - `start`: a kind of resources starts to load state, with its pending addresses
+    - `import`: one resource is imported, or failed to import
+    - `done`: configuration of a kind of resources is synced
+
+    Each event is flushed as it happens, so the journal survives the run being
+    killed at any point.
+    """
+
+    def __init__(self, root):
+        self.path = journal_path(root)
+        self._lock = Lock()
+
+    def append(self, event, **kwargs):
+        """append an event to the journal"""
+        line = json.dumps(dict(event=event, time=time.time(), **kwargs))
+        with self._lock:
+            if not path.exists(path.dirname(self.path)):
+                makedirs(path.dirname(self.path), exist_ok=True)
+            with open(self.path, "at") as fd:
+                fd.write(line + "\n")
+
+    def events(self):
+        """yield events of the journal, a torn last line is ignored"""
+        if not path.exists(self.path):
+            return
+        with open(self.path, "rt") as fd:
+            for line in fd:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def status(self):
+        """progress of the latest run of each kind of resources in the journal
+
+        :return: dict of resource class name to its progress
+        """
+        runs = dict()
+        for one in self.events():
+            name = one["resource"]
+            if one["event"] == "start":
+                runs[name] = dict(
+                    resource=name,
+                    total=len(one["addresses"]),
+                    outcomes=dict.fromkeys(one["addresses"]),
+                    started=one["time"],
+                    updated=one["time"],
+                    done=False,
+                )
+            elif name in runs:
+                run = runs[name]
+                run["updated"] = one["time"]
+                if one["event"] == "import":
+                    run["outcomes"][one["address"]] = one["ok"]
+                elif one["event"] == "done":
+                    run["done"] = True
+        for run in runs.values():
+            outcomes = list(run.pop("outcomes").values())
+            run["ok"] = outcomes.count(True)
+            run["failed"] = outcomes.count(False)
+            run["pending"] = outcomes.count(None)
+            run["elapsed"] = run["updated"] - run["started"]
+        return runs
+
+    def is_done(self, name):
+        """whether the latest run of a kind of resources is completed"""
+        run = self.status().get(name)
+        return bool(run and run["done"] and not run["failed"])
+
+
+def list_journals(output):
+    """yield journals of all output directories under `output`"""
+    for current, dirs, _files in walk(output):
+        # skip .terraform, .tfcli and the like
+        dirs[:] = sorted(_ for _ in dirs if not _.startswith("."))
+        if path.exists(journal_path(current)):
+            yield current, Journal(current)
+
+
+def failures_path(root, name):
+    """path of the report of failed imports of a kind of resources
+
+    :param root: output directory of the resources
+    :param name: name of the resource class
+    """
+    return path.join(root, META_DIR, "{}.failures.json".format(name))
+
+
+def save_failures(root, name, failures: list):
+    """save failed imports of the latest run as a machine-readable report
+
+    :param root: output directory of the resources
+    :param name: name of the resource class
+    :param failures: list of dict of address, id, kind, transient, attempts,
+        command and error
+    """
+    report_file = failures_path(root, name)
+    if not path.exists(path.dirname(report_file)):
+        makedirs(path.dirname(report_file), exist_ok=True)
+    with open(report_file, "wt") as fd:
+        json.dump(failures, fd, indent=2)
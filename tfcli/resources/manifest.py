@@ -0,0 +1,61 @@
+import json
+from os import path, listdir, makedirs
+
+# tfcli keeps its bookkeeping files of an output directory here
+META_DIR = ".tfcli"
+
+
+def manifest_path(root, name):
+    """path of the sync manifest of a kind of resources in an output directory
+
+    :param root: output directory of the resources
+    :param name: name of the resource class
+    """
+    return path.join(root, META_DIR, "{}.manifest.json".format(name))
+
+
+def load_manifest(root, name):
+    """load the manifest written by the previous sync, which maps each resource
+    address to its import id, attributes digest, rendered configuration, and
+    whether its configuration is touched by `ignore_attrbute` or `amend_attributes`
+
+    :param root: output directory of the resources
+    :param name: name of the resource class
+    :return: dict of address to its entry, empty if there is no previous sync
+    """
+    manifest_file = manifest_path(root, name)
+    if not path.exists(manifest_file):
+        return dict()
+    with open(manifest_file, "rt") as fd:
+        return json.load(fd)
+
+
+def save_manifest(root, name, manifest: dict):
+    """save the manifest of this sync, for the next incremental one
+
+    :param root: output directory of the resources
+    :param name: name of the resource class
+    :param manifest: dict of address to its entry
+    """
+    manifest_file = manifest_path(root, name)
+    if not path.exists(path.dirname(manifest_file)):
+        makedirs(path.dirname(manifest_file), exist_ok=True)
+    with open(manifest_file, "wt") as fd:
+        json.dump(manifest, fd, indent=2, sort_keys=True)
+
+
+def touched_addresses(root):
+    """addresses of all resources in an output directory, whose configuration
+    is touched by `ignore_attrbute` or `amend_attributes` in the previous sync
+
+    :param root: output directory of the resources
+    """
+    meta_dir = path.join(root, META_DIR)
+    if not path.exists(meta_dir):
+        return set()
+    touched = set()
+    for one in sorted(listdir(meta_dir)):
+        if one.endswith(".manifest.json"):
+            manifest = load_manifest(root, one[: -len(".manifest.json")])
+            touched.update(k for k, v in manifest.items() if v.get("touched"))
+    return touched
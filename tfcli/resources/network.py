@@ -5,18 +5,21 @@ from ..filters import normalize_identity
 class Vpc(BaseResource):
     """vpc resource to generate from current region"""
 
-    def __init__(self, logger=None):
-        super().__init__(logger)
+    supported_filters = ("tag:", "tag-key", "vpc-id", "cidr", "is-default")
+    computed_attributes = (
+        "default_network_acl_id",
+        "default_route_table_id",
+        "default_security_group_id",
+        "main_route_table_id",
+        "dhcp_options_id",
+    )
+
+    def __init__(self, logger=None, **kwargs):
+        super().__init__(logger, **kwargs)
 
     @classmethod
     def ignore_attrbute(cls, key, value):
-        if key in ["id", "owner_id", "arn"] + [
-            "default_network_acl_id",
-            "default_route_table_id",
-            "default_security_group_id",
-            "main_route_table_id",
-            "dhcp_options_id",
-        ]:
+        if key in ["id", "owner_id", "arn"] + list(cls.computed_attributes):
             return True
         return False
 
@@ -32,8 +35,8 @@ class Vpc(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        ec2 = self.session.client("ec2")
-        items = ec2.describe_vpcs()["Vpcs"]
+        ec2 = self.client("ec2")
+        items = self.paginate(ec2, "describe_vpcs", "Vpcs", Filters=self.api_filters())
         for one in items:
             _id = one["VpcId"]
             _name = self.get_resource_name_from_tags(one["Tags"]) or _id
@@ -43,8 +46,8 @@ class Vpc(BaseResource):
 class Igw(BaseResource):
     """igw (internet gateway) resource to generate from current region"""
 
-    def __init__(self, logger=None):
-        super().__init__(logger)
+    def __init__(self, logger=None, **kwargs):
+        super().__init__(logger, **kwargs)
 
     @classmethod
     def ignore_attrbute(cls, key, value):
@@ -62,8 +65,8 @@ class Igw(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        ec2 = self.session.client("ec2")
-        igws = ec2.describe_internet_gateways()["InternetGateways"]
+        ec2 = self.client("ec2")
+        igws = self.paginate(ec2, "describe_internet_gateways", "InternetGateways")
         for item in igws:
             # find name in tags, fall back to id if not exists
             _id = item["InternetGatewayId"]
@@ -74,22 +77,32 @@ class Igw(BaseResource):
 class Eip(BaseResource):
     """eip resource to generate from current region"""
 
-    def __init__(self, logger=None, indexes=None):
-        super().__init__(logger)
+    supported_filters = (
+        "tag:",
+        "tag-key",
+        "domain",
+        "instance-id",
+        "network-interface-id",
+        "allocation-id",
+    )
+    computed_attributes = (
+        "domain",
+        "public_dns",
+        "private_dns",
+        "association_id",
+        "public_ip",
+        "private_ip",
+    )
+
+    def __init__(self, logger=None, indexes=None, **kwargs):
+        super().__init__(logger, **kwargs)
         self.indexes = (
             indexes  # limit resource indexes to return, primarily for speeding testing
         )
 
     @classmethod
     def ignore_attrbute(cls, key, value):
-        if key in ["id", "owner_id", "arn"] + [
-            "domain",
-            "public_dns",
-            "private_dns",
-            "association_id",
-            "public_ip",
-            "private_ip",
-        ]:
+        if key in ["id", "owner_id", "arn"] + list(cls.computed_attributes):
             return True
         return False
 
@@ -105,8 +118,10 @@ class Eip(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        ec2 = self.session.client("ec2")
-        items = ec2.describe_addresses()["Addresses"]
+        ec2 = self.client("ec2")
+        items = self.paginate(
+            ec2, "describe_addresses", "Addresses", Filters=self.api_filters()
+        )
         for i, one in enumerate(items):
             if (not self.indexes) or (i in self.indexes):
                 _id = one["AllocationId"]
@@ -116,16 +131,26 @@ class Eip(BaseResource):
 class Nif(BaseResource):
     """aws_network_interface to generate from current region"""
 
-    def __init__(self, logger=None, indexes=None):
-        super().__init__(logger)
+    supported_filters = (
+        "tag:",
+        "tag-key",
+        "vpc-id",
+        "subnet-id",
+        "requester-managed",
+        "availability-zone",
+        "group-id",
+    )
+    computed_attributes = ("mac_address", "private_dns_name")
+
+    def __init__(self, logger=None, indexes=None, **kwargs):
+        super().__init__(logger, **kwargs)
         self.indexes = indexes
 
     @classmethod
     def ignore_attrbute(cls, key, value):
-        if key in ["id", "owner_id", "arn", "unique_id"] + [
-            "mac_address",
-            "private_dns_name",
-        ]:
+        if key in ["id", "owner_id", "arn", "unique_id"] + list(
+            cls.computed_attributes
+        ):
             return True
         return False
 
@@ -153,8 +178,13 @@ class Nif(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        ec2 = self.session.client("ec2")
-        items = ec2.describe_network_interfaces()["NetworkInterfaces"]
+        ec2 = self.client("ec2")
+        items = self.paginate(
+            ec2,
+            "describe_network_interfaces",
+            "NetworkInterfaces",
+            Filters=self.api_filters(),
+        )
         for i, one in enumerate(items):
             _id = one["NetworkInterfaceId"]
             # HACK: skip those managed by amazon-rds, with Attachment.InstanceId
@@ -167,8 +197,10 @@ class Nif(BaseResource):
 class Nacl(BaseResource):
     """aws_network_interface to generate from current region"""
 
-    def __init__(self, logger=None, indexes=None):
-        super().__init__(logger)
+    supported_filters = ("tag:", "tag-key", "vpc-id", "network-acl-id", "default")
+
+    def __init__(self, logger=None, indexes=None, **kwargs):
+        super().__init__(logger, **kwargs)
         self.indexes = indexes
 
     @classmethod
@@ -189,8 +221,10 @@ class Nacl(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        ec2 = self.session.client("ec2")
-        items = ec2.describe_network_acls()["NetworkAcls"]
+        ec2 = self.client("ec2")
+        items = self.paginate(
+            ec2, "describe_network_acls", "NetworkAcls", Filters=self.api_filters()
+        )
         for i, one in enumerate(items):
             _id = one["NetworkAclId"]
             if not self.indexes or i in self.indexes:
@@ -200,8 +234,16 @@ class Nacl(BaseResource):
 class Rt(BaseResource):
     """aws_route_table to generate from current region"""
 
-    def __init__(self, logger=None, indexes=None):
-        super().__init__(logger)
+    supported_filters = (
+        "tag:",
+        "tag-key",
+        "vpc-id",
+        "route-table-id",
+        "association.subnet-id",
+    )
+
+    def __init__(self, logger=None, indexes=None, **kwargs):
+        super().__init__(logger, **kwargs)
         self.indexes = indexes
 
     @classmethod
@@ -224,8 +266,10 @@ class Rt(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        ec2 = self.session.client("ec2")
-        items = ec2.describe_route_tables()["RouteTables"]
+        ec2 = self.client("ec2")
+        items = self.paginate(
+            ec2, "describe_route_tables", "RouteTables", Filters=self.api_filters()
+        )
         for i, one in enumerate(items):
             _id = one["RouteTableId"]
             if not self.indexes or i in self.indexes:
@@ -250,8 +294,10 @@ class Rt(BaseResource):
 class Sg(BaseResource):
     """aws_security_group to generate from current region"""
 
-    def __init__(self, logger=None, indexes=None):
-        super().__init__(logger)
+    supported_filters = ("tag:", "tag-key", "vpc-id", "group-id", "group-name")
+
+    def __init__(self, logger=None, indexes=None, **kwargs):
+        super().__init__(logger, **kwargs)
         self.indexes = indexes
 
     def amend_attributes(self, _type, _name, attributes: dict):
@@ -287,8 +333,13 @@ class Sg(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        ec2 = self.session.client("ec2")
-        items = ec2.describe_security_groups()["SecurityGroups"]
+        ec2 = self.client("ec2")
+        items = self.paginate(
+            ec2,
+            "describe_security_groups",
+            "SecurityGroups",
+            Filters=self.api_filters(),
+        )
         for i, one in enumerate(items):
             name, _id, vpc_id = one["GroupName"], one["GroupId"], one["VpcId"]
             if " " in name:
@@ -304,8 +355,10 @@ class Sg(BaseResource):
 class Subnet(BaseResource):
     """aws_subnet to generate from current region"""
 
-    def __init__(self, logger=None, indexes=None):
-        super().__init__(logger)
+    supported_filters = ("tag:", "tag-key", "vpc-id", "subnet-id", "availability-zone")
+
+    def __init__(self, logger=None, indexes=None, **kwargs):
+        super().__init__(logger, **kwargs)
         self.indexes = indexes
 
     def amend_attributes(self, _type, _name, attributes: dict):
@@ -336,8 +389,10 @@ class Subnet(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        ec2 = self.session.client("ec2")
-        items = ec2.describe_subnets()["Subnets"]
+        ec2 = self.client("ec2")
+        items = self.paginate(
+            ec2, "describe_subnets", "Subnets", Filters=self.api_filters()
+        )
         for i, one in enumerate(items):
             _id = one["SubnetId"]
             name = self.get_resource_name_from_tags(one["Tags"])
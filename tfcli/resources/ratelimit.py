@@ -0,0 +1,141 @@
+import time
+from functools import partial
+from threading import Lock
+
+# error codes AWS APIs respond with when requests are throttled
+THROTTLING_ERRORS = {
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestThrottledException",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "RequestThrottled",
+    "BandwidthLimitExceeded",
+    "SlowDown",
+    "EC2ThrottledException",
+    "PriorRequestNotComplete",
+}
+
+
+class TokenBucket:
+    """Token bucket of one API operation, whose rate is adapted to throttling:
+    halved on every throttled response, and ramped up on successful ones
+    until it reaches the configured rate again.
+    """
+
+    def __init__(self, rate, min_rate=0.5, ramp_up=0.1):
+        """
+        :param rate: max requests per second
+        :param min_rate: lowest rate to back off to
+        :param ramp_up: rate to add back on each successful response
+        """
+        self.max_rate = self.rate = float(rate)
+        self.min_rate = min(min_rate, self.max_rate)
+        self.ramp_up = ramp_up
+        self.tokens = self.rate
+        self.updated = time.monotonic()
+        self.calls = 0
+        self.throttled = 0
+        self.waited = 0.0
+        self._lock = Lock()
+
+    def burst(self):
+        """max tokens to keep, one second of requests, but at least one for
+        rates below 1 request per second
+        """
+        return max(1.0, self.rate)
+
+    def acquire(self):
+        """wait until a request is allowed"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.burst(), self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.calls += 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+                self.waited += delay
+            time.sleep(delay)
+
+    def on_throttled(self):
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, self.burst())
+
+    def on_succeeded(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.ramp_up)
+
+    def stats(self):
+        return dict(
+            calls=self.calls,
+            throttled=self.throttled,
+            waited=round(self.waited, 3),
+            rate=round(self.rate, 3),
+            max_rate=self.max_rate,
+        )
+
+
+class RateLimiter:
+    """Client side rate limiter of AWS API calls, with one adaptive token bucket
+    per (service, operation). It hooks into every attempt of registered clients,
+    including retries of botocore.
+    """
+
+    def __init__(self, rate=20.0, limits=None):
+        """
+        :param rate: default max requests per second of an operation
+        :param limits: dict of `<service>` or `<service>.<Operation>` to its own
+            max requests per second, such as {"iam": 5, "ec2.DescribeInstances": 2}
+        """
+        self.rate = rate
+        self.limits = dict(limits or dict())
+        self._buckets = dict()
+        self._lock = Lock()
+
+    def bucket(self, service, operation):
+        """token bucket of an API operation"""
+        key = "{}.{}".format(service, operation)
+        with self._lock:
+            if key not in self._buckets:
+                rate = self.limits.get(key, self.limits.get(service, self.rate))
+                self._buckets[key] = TokenBucket(rate)
+            return self._buckets[key]
+
+    def register(self, client, service):
+        """limit API calls of a client
+
+        :param client: boto3 client to limit
+        :param service: service name the client is created with, such as `ec2`
+        """
+        events = client.meta.events
+        events.register("before-send", partial(self._before_send, service))
+        events.register("needs-retry", partial(self._needs_retry, service))
+
+    def _before_send(self, service, event_name, **kwargs):
+        self.bucket(service, event_name.split(".")[-1]).acquire()
+        # NOTE: must return None, or botocore would take it as the response
+
+    def _needs_retry(self, service, event_name, response=None, **kwargs):
+        if response is None:  # connection errors are not about throttling
+            return
+        bucket = self.bucket(service, event_name.split(".")[-1])
+        http_response, parsed = response
+        code = parsed.get("Error", {}).get("Code")
+        if code in THROTTLING_ERRORS or http_response.status_code == 429:
+            bucket.on_throttled()
+        elif http_response.status_code < 400:
+            bucket.on_succeeded()
+
+    def stats(self):
+        """counters of every API operation called, keyed by `<service>.<Operation>`"""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {k: v.stats() for k, v in sorted(buckets.items())}
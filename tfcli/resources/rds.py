@@ -5,19 +5,23 @@ class Rds(BaseResource):
     """ aws_db_instance to generate from current region
     """
 
-    def __init__(self, logger=None, indexes=None):
-        super().__init__(logger)
+    computed_attributes = (
+        "hosted_zone_id",
+        "resource_id",
+        "address",
+        "endpoint",
+        "status",
+    )
+
+    def __init__(self, logger=None, indexes=None, **kwargs):
+        super().__init__(logger, **kwargs)
         self.indexes = indexes
 
     @classmethod
     def ignore_attrbute(cls, key, value):
-        if key in ["id", "owner_id", "arn", "unique_id"] + [
-            "hosted_zone_id",
-            "resource_id",
-            "address",
-            "endpoint",
-            "status",
-        ]:
+        if key in ["id", "owner_id", "arn", "unique_id"] + list(
+            cls.computed_attributes
+        ):
             return True
         return False
 
@@ -32,14 +36,14 @@ class Rds(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        rds = self.session.client("rds")
-        items = rds.describe_db_instances()["DBInstances"]
+        rds = self.client("rds")
+        items = self.paginate(rds, "describe_db_instances", "DBInstances")
         for i, one in enumerate(items):
             _id = one["DBInstanceIdentifier"]
             if not self.indexes or i in self.indexes:
                 yield self.included_resource_types()[0], _id, _id
 
-        items = rds.describe_db_subnet_groups()["DBSubnetGroups"]
+        items = self.paginate(rds, "describe_db_subnet_groups", "DBSubnetGroups")
         for i, one in enumerate(items):
             name = one["DBSubnetGroupName"]
             _id = one["DBSubnetGroupArn"]
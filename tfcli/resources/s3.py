@@ -5,15 +5,20 @@ class S3(BaseResource):
     """ S3 resource to generate from current region
     """
 
-    def __init__(self, logger=None, indexes=None):
-        super().__init__(logger)
+    computed_attributes = ("bucket_regional_domain_name", "bucket_domain_name")
+
+    # `list_buckets` lists buckets of every region
+    is_global = True
+
+    def __init__(self, logger=None, indexes=None, **kwargs):
+        super().__init__(logger, **kwargs)
         self.indexes = (
             indexes  # limit resource indexes to return, primarily for speeding testing
         )
 
     @classmethod
     def ignore_attrbute(cls, key, value):
-        return key in ["arn", "id", "bucket_regional_domain_name", "bucket_domain_name"]
+        return key in ["arn", "id"] + list(cls.computed_attributes)
 
     @classmethod
     def included_resource_types(cls):
@@ -35,7 +40,7 @@ class S3(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        s3 = self.session.resource("s3")
-        for i, bucket in enumerate(s3.buckets.all()):
+        s3 = self.client("s3")
+        for i, name in enumerate(self.paginate(s3, "list_buckets", "Buckets[].Name")):
             if (not self.indexes) or (i in self.indexes):
-                yield "aws_s3_bucket", bucket.name, bucket.name
+                yield "aws_s3_bucket", name, name
@@ -5,8 +5,8 @@ class Sns(BaseResource):
     """ aws_sns_topic, and aws_sns_topic_subscription to generate from current region
     """
 
-    def __init__(self, logger=None, indexes=None):
-        super().__init__(logger)
+    def __init__(self, logger=None, indexes=None, **kwargs):
+        super().__init__(logger, **kwargs)
         self.indexes = indexes
 
     def amend_attributes(self, _type, _name, attributes: dict):
@@ -39,8 +39,8 @@ class Sns(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        sns = self.session.client("sns")
-        items = sns.list_topics()["Topics"]
+        sns = self.client("sns")
+        items = self.paginate(sns, "list_topics", "Topics")
         for i, one in enumerate(items):
             arn = one["TopicArn"]
             name = arn.split(":")[-1]
@@ -49,7 +49,7 @@ class Sns(BaseResource):
 
         # NOTE: "email" is not supported as subscription protocal
         # ref: https://www.terraform.io/docs/providers/aws/r/sns_topic_subscription.html#protocols-supported
-        items = sns.list_subscriptions()["Subscriptions"]
+        items = self.paginate(sns, "list_subscriptions", "Subscriptions")
         for i, one in enumerate(items):
             arn = one["SubscriptionArn"]
             name = arn.split(":")[-1]
@@ -5,8 +5,8 @@ class Sqs(BaseResource):
     """ aws_sqs_queue to generate from current region
     """
 
-    def __init__(self, logger=None, indexes=None):
-        super().__init__(logger)
+    def __init__(self, logger=None, indexes=None, **kwargs):
+        super().__init__(logger, **kwargs)
         self.indexes = indexes
 
     @classmethod
@@ -28,8 +28,8 @@ class Sqs(BaseResource):
 
         :return: list of tupe for a resource (type, name, id)
         """
-        sqs = self.session.client("sqs")
-        items = sqs.list_queues()["QueueUrls"]
+        sqs = self.client("sqs")
+        items = self.paginate(sqs, "list_queues", "QueueUrls")
         for i, one in enumerate(items):
             name = one.split("/")[-1]
             if not self.indexes or i in self.indexes:
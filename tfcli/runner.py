@@ -0,0 +1,263 @@
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+# outcome of a command, stdout and stderr are their last lines only
+CommandResult = namedtuple(
+    "CommandResult", "cmd returncode stdout stderr elapsed timed_out"
+)
+
+# number of the last output lines kept of each stream of a command
+MAX_LINES = 200
+# seconds to wait for a command to exit after SIGTERM, before SIGKILL
+KILL_GRACE = 5
+# seconds to wait for a command by default, None to wait forever
+DEFAULT_TIMEOUT = None
+# bytes read from an output stream of a command at a time by `run_async`
+CHUNK_SIZE = 64 * 1024
+
+# commands are started as process group leaders, to kill their children as well
+_NEW_SESSION = os.name == "posix"
+
+
+def configure(timeout=None):
+    """change default settings of commands run in this process
+
+    :param timeout: seconds to wait for a command by default, None to wait forever
+    """
+    global DEFAULT_TIMEOUT
+    DEFAULT_TIMEOUT = timeout
+
+
+def _signal(proc, sig):
+    try:
+        if _NEW_SESSION:
+            os.killpg(proc.pid, sig)
+        else:
+            proc.kill()
+    except ProcessLookupError:  # exited already
+        pass
+
+
+def _short_name(cmd):
+    """name of a command to prefix its output lines with, such as `terraform import`"""
+    return " ".join([os.path.basename(cmd[0]), *cmd[1:2]])
+
+
+@contextmanager
+def _stdout_of(cwd, stdout_file):
+    """stdout of a command to start, the file is closed once it is started"""
+    if not stdout_file:
+        yield subprocess.PIPE
+        return
+    with open(os.path.join(cwd or os.curdir, stdout_file), "wb") as fd:
+        yield fd
+
+
+def _pump(stream, lines, logger, level, name):
+    for raw in iter(stream.readline, b""):
+        line = raw.decode(errors="replace").rstrip("\n")
+        lines.append(line)
+        if logger:
+            logger.log(level, "{}: {}".format(name, line))
+    stream.close()
+
+
+def _result(cmd, proc, stdout, stderr, started, timed_out, logger):
+    result = CommandResult(
+        cmd=cmd,
+        returncode=proc.returncode,
+        stdout=list(stdout),
+        stderr=list(stderr),
+        elapsed=time.time() - started,
+        timed_out=timed_out,
+    )
+    if timed_out:
+        # such as failures of terraform, so it can be classified as timeout
+        result.stderr.append("timed out after {:.0f}s".format(result.elapsed))
+    if logger:
+        logger.debug(
+            "exit {} in {:.1f}s: {}".format(
+                result.returncode, result.elapsed, " ".join(cmd)
+            )
+        )
+    return result
+
+
+def run(
+    cmd: list,
+    logger=None,
+    cwd=None,
+    timeout=None,
+    max_lines=MAX_LINES,
+    log_level=logging.DEBUG,
+    stdout_file=None,
+):
+    """run a command, its output is logged line by line as it is written,
+    and the whole process group is killed if it runs out of time
+
+    :param cmd: command and its arguments
+    :param logger: logger to log the command and its output to
+    :param cwd: working directory of the command
+    :param timeout: seconds to wait for the command, default to `DEFAULT_TIMEOUT`
+    :param max_lines: number of the last output lines to keep of each stream
+    :param log_level: level to log output lines with
+    :param stdout_file: file to write stdout to instead of logging it, such as
+        large json documents, relative to cwd
+    :return: `CommandResult`
+    """
+    timeout = timeout or DEFAULT_TIMEOUT
+    if logger:
+        logger.info("running: {}".format(" ".join(cmd)))
+    started = time.time()
+    with _stdout_of(cwd, stdout_file) as out:
+        proc = subprocess.Popen(
+            cmd,
+            stdout=out,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            start_new_session=_NEW_SESSION,
+        )
+    name = _short_name(cmd)
+    stdout, stderr = deque(maxlen=max_lines), deque(maxlen=max_lines)
+    readers = [
+        threading.Thread(
+            target=_pump, args=(proc.stderr, stderr, logger, log_level, name)
+        )
+    ]
+    if not stdout_file:
+        readers.append(
+            threading.Thread(
+                target=_pump, args=(proc.stdout, stdout, logger, log_level, name)
+            )
+        )
+    for one in readers:
+        one.start()
+    timed_out = False
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        if logger:
+            logger.error("kill {} after {}s".format(" ".join(cmd), timeout))
+        _signal(proc, signal.SIGTERM)
+        try:
+            proc.wait(timeout=KILL_GRACE)
+        except subprocess.TimeoutExpired:
+            _signal(proc, signal.SIGKILL)
+            proc.wait()
+    for one in readers:
+        one.join()
+    return _result(cmd, proc, stdout, stderr, started, timed_out, logger)
+
+
+async def _pump_async(stream, lines, logger, level, name):
+    # read chunks instead of `readline`, which fails on lines over its limit
+    pending = b""
+    while True:
+        chunk = await stream.read(CHUNK_SIZE)
+        *complete, pending = (pending + chunk).split(b"\n")
+        if not chunk and pending:
+            complete.append(pending)
+        for raw in complete:
+            line = raw.decode(errors="replace")
+            lines.append(line)
+            if logger:
+                logger.log(level, "{}: {}".format(name, line))
+        if not chunk:
+            break
+
+
+async def run_async(
+    cmd: list,
+    logger=None,
+    cwd=None,
+    timeout=None,
+    max_lines=MAX_LINES,
+    log_level=logging.DEBUG,
+    stdout_file=None,
+):
+    """asyncio variant of `run`, for many commands to be supervised by one thread"""
+    timeout = timeout or DEFAULT_TIMEOUT
+    if logger:
+        logger.info("running: {}".format(" ".join(cmd)))
+    started = time.time()
+    with _stdout_of(cwd, stdout_file) as out:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=out,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            start_new_session=_NEW_SESSION
+        )
+    name = _short_name(cmd)
+    stdout, stderr = deque(maxlen=max_lines), deque(maxlen=max_lines)
+    pumps = [_pump_async(proc.stderr, stderr, logger, log_level, name)]
+    if not stdout_file:
+        pumps.append(_pump_async(proc.stdout, stdout, logger, log_level, name))
+    readers = asyncio.gather(*pumps)
+    timed_out = False
+    try:
+        await asyncio.wait_for(proc.wait(), timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+        if logger:
+            logger.error("kill {} after {}s".format(" ".join(cmd), timeout))
+        _signal(proc, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(proc.wait(), KILL_GRACE)
+        except asyncio.TimeoutError:
+            _signal(proc, signal.SIGKILL)
+            await proc.wait()
+    await readers
+    return _result(cmd, proc, stdout, stderr, started, timed_out, logger)
+
+
+def run_all(commands, logger=None, timeout=None, concurrency=8, **kwargs):
+    """run many commands from this thread, at most `concurrency` at a time
+
+    :param commands: list of (cmd, cwd)
+    :param logger: logger to log commands and their output to
+    :param timeout: seconds to wait for each command
+    :param concurrency: max number of commands running at the same time
+    :param kwargs: other arguments of `run_async`
+    :return: list of `CommandResult`, in the same order of commands
+    """
+
+    async def run_limited():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def limited(cmd, cwd):
+            async with semaphore:
+                started = time.time()
+                try:
+                    return await run_async(cmd, logger, cwd, timeout, **kwargs)
+                except Exception as ex:
+                    # such as a missing executable, other commands keep running
+                    if logger:
+                        logger.error("failed to run {}: {}".format(" ".join(cmd), ex))
+                    return CommandResult(
+                        cmd=cmd,
+                        returncode=-1,
+                        stdout=[],
+                        stderr=[str(ex)],
+                        elapsed=time.time() - started,
+                        timed_out=False,
+                    )
+
+        return await asyncio.gather(*[limited(cmd, cwd) for cmd, cwd in commands])
+
+    loop = asyncio.new_event_loop()
+    # the child watcher of python 3.7 only works with the current event loop
+    asyncio.set_event_loop(loop)
+    try:
+        return list(loop.run_until_complete(run_limited()))
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
@@ -0,0 +1,746 @@
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from uuid import uuid4
+
+# number of characters to read at a time when streaming a json document
+CHUNK_SIZE = 1 << 20
+# how to resolve resources of the same address in states to merge
+CONFLICT_POLICIES = ["error", "first", "last", "newest"]
+# whether to write states without indent by default, see `configure`
+COMPACT_STATES = False
+SEPARATORS = re.compile(r"[\s,]*")
+WHITESPACE = re.compile(r"\s*")
+
+
+def configure(compact=False):
+    """change default settings of states written in this process
+
+    :param compact: whether to write states without indent by default, for
+        states which are not to be read or diffed by human
+    """
+    global COMPACT_STATES
+    COMPACT_STATES = compact
+
+
+def empty_state(terraform_version="0.12.24", lineage=None):
+    """an empty v4 state `container` to import resources into"""
+    return dict(
+        version=4,
+        terraform_version=terraform_version,
+        serial=1,
+        lineage=lineage or str(uuid4()),
+        output=dict(),
+        resources=list(),
+    )
+
+
+def read_state(state_file):
+    with open(state_file, "rt") as fd:
+        return json.load(fd)
+
+
+@contextmanager
+def atomic_write(target, mode="wt", **kwargs):
+    """open a temp file next to `target` to write, which is renamed over the
+    target once it is written and synced, so the target is never torn by a
+    crash. The temp file is removed if writing fails.
+    """
+    tmp_file = "{}.{}.tmp".format(target, uuid4().hex)
+    try:
+        with open(tmp_file, mode, **kwargs) as fd:
+            yield fd
+            fd.flush()
+            os.fsync(fd.fileno())
+        os.replace(tmp_file, target)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def _same_content(file, content: bytes):
+    """whether a file exists with the content, by size then hash"""
+    try:
+        if os.path.getsize(file) != len(content):
+            return False
+    except OSError:
+        return False
+    digest = hashlib.sha1()
+    with open(file, "rb") as fd:
+        for chunk in iter(lambda: fd.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.digest() == hashlib.sha1(content).digest()
+
+
+def write_state(state_file, data: dict, compact=None):
+    """write a state with `atomic_write`, unless the file has the same content
+
+    :param state_file: path of the state file
+    :param data: the state
+    :param compact: whether to write json without indent, default to
+        `COMPACT_STATES`
+    :return: whether the file is written
+    """
+    if compact is None:
+        compact = COMPACT_STATES
+    if compact:
+        text = json.dumps(data, separators=(",", ":"))
+    else:
+        text = json.dumps(data, indent=2)
+    content = text.encode()
+    if _same_content(state_file, content):
+        return False
+    with atomic_write(state_file, "wb") as fd:
+        fd.write(content)
+    return True
+
+
+def resource_address(res: dict):
+    """address of a resource in v4 state, such as `aws_vpc.main` or
+    `module.network.aws_vpc.main`
+    """
+    address = "{}.{}".format(res["type"], res["name"])
+    if res.get("mode", "managed") == "data":
+        address = "data." + address
+    if res.get("module"):
+        address = "{}.{}".format(res["module"], address)
+    return address
+
+
+def merge_states(target: dict, sources: list):
+    """merge resources of v4 states into a target one, resources of sources take
+    precedence over the ones of the same address in target
+
+    :param target: state to merge into, its lineage is kept
+    :param sources: list of states to merge from
+    :return: the merged state, with a serial greater than all of the states
+    """
+    resources = {resource_address(_): _ for _ in target["resources"]}
+    for one in sources:
+        for res in one["resources"]:
+            resources[resource_address(res)] = res
+    merged = dict(target)
+    merged["resources"] = list(resources.values())
+    merged["serial"] = max(_.get("serial", 0) for _ in [target, *sources]) + 1
+    return merged
+
+
+def iter_json_array(stream, key, chunk_size=CHUNK_SIZE):
+    """yield items of the first array of `key` in a json document, reading it
+    chunk by chunk, so that only one item is kept in memory at a time
+
+    :param stream: text stream of the json document
+    :param key: key of the array, such as `resources`
+    :param chunk_size: number of characters to read at a time
+    """
+    decoder = json.JSONDecoder()
+    start = re.compile(r'(?<!\\)"{}"\s*:\s*\['.format(re.escape(key)))
+    buf = ""
+    while True:
+        match = start.search(buf)
+        if match:
+            buf, pos = buf[match.end() :], 0
+            break
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        # keep a tail in case the key is split between chunks
+        buf = buf[-(len(key) + 64) :] + chunk
+
+    while True:
+        pos = SEPARATORS.match(buf, pos).end()
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+            # a number at the end of buffer may be cut by the chunk
+            complete = end < len(buf) or isinstance(item, (dict, list))
+        except ValueError:
+            complete = False
+        if complete:
+            yield item
+            pos = end
+            continue
+        # read at least as much as buffered, so a large item is not parsed
+        # again and again for every chunk
+        chunk = stream.read(max(chunk_size, len(buf) - pos))
+        if not chunk:
+            raise ValueError("unexpected end of {} array".format(key))
+        buf, pos = buf[pos:] + chunk, 0
+
+
+class JsonReader:
+    """Reader of a json document from a text stream, which decodes one value at
+    a time and keeps track of its offset, so that large documents never have
+    to be loaded as a whole.
+
+    Read a file with `_open_raw` to get offsets in bytes, as every byte is
+    decoded to one character. Strings of non-ascii characters should be fixed
+    with `utf8`.
+    """
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.base = 0  # offset of buf[0] in the document
+        self._decoder = json.JSONDecoder()
+
+    @property
+    def offset(self):
+        """offset of the current position in the document"""
+        return self.base + self.pos
+
+    def _fill(self, size=0):
+        chunk = self.stream.read(max(size, self.chunk_size))
+        self.base += self.pos
+        self.buf, self.pos = self.buf[self.pos :] + chunk, 0
+        return bool(chunk)
+
+    def peek(self):
+        """skip whitespace and return the next character, "" at the end"""
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars):
+        """consume the next character, which should be one of `chars`"""
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError(
+                "expect one of {} at offset {}, got {!r}".format(chars, self.offset, c)
+            )
+        self.pos += 1
+        return c
+
+    def value(self):
+        """decode the next value
+
+        :return: tuple of (start, end, value), end is exclusive
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+                # a number at the end of buffer may be cut by the chunk
+                if end < len(self.buf) or not isinstance(value, (int, float)):
+                    break
+            except ValueError:
+                pass
+            # read at least as much as buffered, so a large value is not
+            # decoded again and again for every chunk
+            if not self._fill(len(self.buf) - self.pos):
+                raise ValueError("unexpected end at offset {}".format(self.offset))
+        start = self.offset
+        self.pos = end
+        return start, self.offset, value
+
+    def text(self, start, end):
+        """text of the value just returned by `value`, which is still buffered"""
+        return self.buf[start - self.base : end - self.base]
+
+    def members(self):
+        """yield keys of an object, the caller should consume the value of each
+        key before asking for the next one
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()[2]
+            self.expect(":")
+            yield key
+            if self.expect(",}") == "}":
+                return
+
+    def items(self):
+        """yield index of items of an array, the caller should consume each
+        item before asking for the next one
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        i = 0
+        while True:
+            yield i
+            i += 1
+            if self.expect(",]") == "]":
+                return
+
+
+def _open_raw(state_file):
+    """open a file as latin-1 text without newline translation, so that every
+    byte is one character, \r\n of CRLF files included
+    """
+    return open(state_file, "rt", encoding="latin-1", newline="")
+
+
+def utf8(text):
+    """fix a string read as latin-1 by `JsonReader`"""
+    return text.encode("latin-1").decode("utf8")
+
+
+def module_address(module_path: list):
+    """module address of a v3 module path, such as `module.a.module.b` for
+    ["root", "a", "b"], or None for the root module
+    """
+    if len(module_path) <= 1:
+        return None
+    return ".".join("module.{}".format(_) for _ in module_path[1:])
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode("latin-1")).hexdigest()
+
+
+def _v3_entry(key, start, end, digest, module_path):
+    # key is like <type>.<name>, <type>.<name>.<index> or data.<type>.<name>
+    parts = key.split(".")
+    mode = "managed"
+    if parts[0] == "data":
+        mode, parts = "data", parts[1:]
+    module = module_address(module_path)
+    return dict(
+        address="{}.{}".format(module, key) if module else key,
+        type=parts[0],
+        name=parts[1],
+        module=module,
+        mode=mode,
+        key=key,
+        path=module_path,
+        start=start,
+        end=end,
+        digest=digest,
+    )
+
+
+def scan_state(stream):
+    """scan a v3 or v4 state for the byte range of each resource
+
+    :param stream: the state file opened by `_open_raw`
+    :return: tuple of (meta, entries), meta is a dict of version, serial,
+        lineage and terraform_version, each entry is a dict of address, type,
+        name, module, mode, start, end and digest of the text of a resource,
+        plus key and module path for v3 state
+    """
+    reader = JsonReader(stream)
+    meta = dict()
+    entries = []
+    for key in reader.members():
+        if key == "resources" and reader.peek() == "[":  # v4
+            for _ in reader.items():
+                start, end, res = reader.value()
+                entries.append(
+                    dict(
+                        address=utf8(resource_address(res)),
+                        type=res["type"],
+                        name=utf8(res["name"]),
+                        module=res.get("module") and utf8(res["module"]),
+                        mode=res.get("mode", "managed"),
+                        start=start,
+                        end=end,
+                        digest=_digest(reader.text(start, end)),
+                    )
+                )
+        elif key == "modules":  # v3
+            for _ in reader.items():
+                module_path = ["root"]
+                pending = []
+                for module_key in reader.members():
+                    if module_key == "resources":
+                        for res_key in reader.members():
+                            start, end, _ = reader.value()
+                            digest = _digest(reader.text(start, end))
+                            pending.append((utf8(res_key), start, end, digest))
+                    elif module_key == "path":
+                        module_path = [utf8(_) for _ in reader.value()[2]]
+                    else:
+                        reader.value()
+                entries.extend(_v3_entry(*_, module_path) for _ in pending)
+        elif key in ["version", "serial", "lineage", "terraform_version"]:
+            meta[key] = reader.value()[2]
+        else:
+            reader.value()
+    return meta, entries
+
+
+def index_path(state_file):
+    """path of the sidecar index of a state file"""
+    return "{}.index".format(state_file)
+
+
+def load_index(state_file, rebuild=False):
+    """load the sidecar index of a state file, which is built, or rebuilt if
+    the state file is changed since, with one pass of `scan_state`
+
+    :param state_file: path of the state file
+    :param rebuild: whether to rebuild the index anyway
+    :return: dict of size, mtime, meta and resources of the state file
+    """
+    stat = os.stat(state_file)
+    index_file = index_path(state_file)
+    if not rebuild and os.path.exists(index_file):
+        with open(index_file, "rt") as fd:
+            index = json.load(fd)
+        if (index["size"], index["mtime"]) == (stat.st_size, stat.st_mtime):
+            return index
+    with _open_raw(state_file) as fd:
+        meta, entries = scan_state(fd)
+    index = dict(size=stat.st_size, mtime=stat.st_mtime, meta=meta, resources=entries)
+    with atomic_write(index_file) as fd:
+        json.dump(index, fd)
+    return index
+
+
+def _header(meta):
+    return dict(
+        version=meta.get("version", 4),
+        terraform_version=meta.get("terraform_version"),
+        serial=meta.get("serial", 1),
+        lineage=meta.get("lineage"),
+    )
+
+
+def extract_resources(state_file, index, entries, out_file):
+    """write selected resources of a state file into a new state of the same
+    version, resources are copied byte by byte without being parsed
+
+    :param state_file: path of the state file
+    :param index: index of the state file as returned by `load_index`
+    :param entries: entries of resources in index to extract
+    :param out_file: path of the new state file
+    """
+    header = _header(index["meta"])
+    with open(state_file, "rb") as src, atomic_write(out_file, "wb") as dst:
+
+        def copy(entry):
+            src.seek(entry["start"])
+            dst.write(src.read(entry["end"] - entry["start"]))
+
+        dst.write(json.dumps(header)[:-1].encode())
+        if header["version"] >= 4:
+            dst.write(b', "outputs": {}, "resources": [\n')
+            for i, entry in enumerate(entries):
+                dst.write(b",\n" if i else b"")
+                copy(entry)
+            dst.write(b"\n]}\n")
+            return
+        modules = OrderedDict()
+        for entry in entries:
+            modules.setdefault(tuple(entry["path"]), []).append(entry)
+        dst.write(b', "modules": [\n')
+        for i, (module_path, items) in enumerate(modules.items()):
+            dst.write(b",\n" if i else b"")
+            dst.write(
+                '{{"path": {}, "outputs": {{}}, "resources": {{\n'.format(
+                    json.dumps(list(module_path))
+                ).encode()
+            )
+            for k, entry in enumerate(items):
+                dst.write(b",\n" if k else b"")
+                dst.write("{}: ".format(json.dumps(entry["key"])).encode())
+                copy(entry)
+            dst.write(b'\n}, "depends_on": []}')
+        dst.write(b"\n]}\n")
+
+
+class _SplitWriter:
+    """writer of one output state of `split_state`. Resources are written as
+    they are read, and the header last, as meta may follow resources in the
+    source and keys of a json object are not ordered anyway.
+    """
+
+    def __init__(self, out_file, stack: ExitStack):
+        self.out_file = out_file
+        self.stack = stack
+        self.fd = None
+        self.count = 0
+        self.modules = 0  # v3 modules written
+        self.module_size = 0  # resources written of the current v3 module
+
+    def _open(self, head):
+        # latin-1 to write back the very bytes read by `JsonReader`
+        self.fd = self.stack.enter_context(
+            atomic_write(self.out_file, "wt", encoding="latin-1", newline="")
+        )
+        self.fd.write(head)
+
+    def add(self, text):
+        """add a resource of v4 state"""
+        if self.fd is None:
+            self._open('{"outputs": {}, "resources": [\n')
+        self.fd.write(",\n" if self.count else "")
+        self.fd.write(text)
+        self.count += 1
+
+    def add_v3(self, key, text):
+        """add a resource of the current module of v3 state"""
+        if self.fd is None:
+            self._open('{"modules": [\n')
+        if self.module_size:
+            self.fd.write(",\n")
+        else:
+            self.fd.write(",\n" if self.modules else "")
+            self.fd.write('{"resources": {\n')
+        self.fd.write("{}: {}".format(json.dumps(key, ensure_ascii=False), text))
+        self.module_size += 1
+        self.count += 1
+
+    def end_module(self, module_path):
+        """end the current module of v3 state, if any resource is added to it"""
+        if not self.module_size:
+            return
+        self.fd.write(
+            '\n}}, "path": {}, "outputs": {{}}, "depends_on": []}}'.format(
+                json.dumps(module_path, ensure_ascii=False)
+            )
+        )
+        self.modules += 1
+        self.module_size = 0
+
+    def finish(self, meta):
+        """write the header, the state is in place once the stack is closed"""
+        if self.fd is None:
+            return
+        self.fd.write("\n], {}\n".format(json.dumps(_header(meta))[1:]))
+
+
+def split_state(state_file, groups: dict, chunk_size=CHUNK_SIZE):
+    """split a v3 or v4 state into states of groups of resource types in one
+    pass. Each resource is copied as is into the states of the groups of its
+    type, so memory is bounded by the largest resource, not the whole state.
+
+    :param state_file: path of the state file
+    :param groups: dict of path of output state to resource types in it
+    :param chunk_size: number of characters to read at a time
+    :return: dict of path of output state to number of resources in it, the
+        state is not written if there is none
+    """
+    meta = dict()
+    # temp files of all output states are removed if any fails
+    with ExitStack() as stack, _open_raw(state_file) as fd:
+        writers = OrderedDict((_, _SplitWriter(_, stack)) for _ in groups)
+        by_type = dict()
+        for out_file, types in groups.items():
+            for _type in set(_.lower() for _ in types):
+                by_type.setdefault(_type, []).append(writers[out_file])
+        reader = JsonReader(fd, chunk_size)
+        for key in reader.members():
+            if key == "resources" and reader.peek() == "[":  # v4
+                for _ in reader.items():
+                    start, end, res = reader.value()
+                    for one in by_type.get(res["type"].lower(), []):
+                        one.add(reader.text(start, end))
+            elif key == "modules":  # v3
+                for _ in reader.items():
+                    module_path = ["root"]
+                    for module_key in reader.members():
+                        if module_key == "resources":
+                            for res_key in reader.members():
+                                start, end, res = reader.value()
+                                for one in by_type.get(res["type"].lower(), []):
+                                    one.add_v3(res_key, reader.text(start, end))
+                        elif module_key == "path":
+                            module_path = reader.value()[2]
+                        else:
+                            reader.value()
+                    for one in writers.values():
+                        one.end_module(module_path)
+            elif key in ["version", "serial", "lineage", "terraform_version"]:
+                meta[key] = reader.value()[2]
+            else:
+                reader.value()
+        for one in writers.values():
+            one.finish(meta)
+    return OrderedDict((_, writers[_].count) for _ in groups)
+
+
+def scan_file(state_file):
+    """`scan_state` of a state file, without keeping an index of it"""
+    with _open_raw(state_file) as fd:
+        return scan_state(fd)
+
+
+def _version_key(version):
+    return tuple(int(_) if _.isdigit() else 0 for _ in re.split(r"[.-]", version))
+
+
+def merge_state_files(state_files: list, out_file, on_conflict="error", workers=None):
+    """merge v4 state files into a new state, with a fresh serial and lineage.
+    Inputs are scanned concurrently for the byte ranges of their resources,
+    then resources are copied byte by byte into the new state, without being
+    decoded again.
+
+    :param state_files: paths of the states to merge, in order of precedence
+        for the `first` and `last` policies
+    :param out_file: path of the new state
+    :param on_conflict: how to resolve resources of the same address in many
+        states, one of `CONFLICT_POLICIES`: `error` to refuse to merge, `first`
+        or `last` to keep the one of the first or last state having it, and
+        `newest` to keep the one of the state of the greatest serial
+    :param workers: number of processes to scan states with
+    :return: tuple of (number of resources merged, addresses in conflict)
+    :raise ValueError: if a state is not v4, or resources are in conflict with
+        the `error` policy
+    """
+    if on_conflict not in CONFLICT_POLICIES:
+        raise ValueError("unknown conflict policy {}".format(on_conflict))
+    if workers == 1:
+        scans = [scan_file(_) for _ in state_files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            scans = list(executor.map(scan_file, state_files, chunksize=8))
+    chosen = OrderedDict()  # address -> (index of state, entry)
+    conflicts = []
+    for i, (meta, entries) in enumerate(scans):
+        if meta.get("version", 3) < 4:
+            raise ValueError("{} is not a v4 state".format(state_files[i]))
+        for entry in entries:
+            address = entry["address"]
+            if address not in chosen:
+                chosen[address] = (i, entry)
+                continue
+            conflicts.append(address)
+            kept = chosen[address][0]
+            if on_conflict == "last" or (
+                on_conflict == "newest"
+                and meta.get("serial", 0) > scans[kept][0].get("serial", 0)
+            ):
+                chosen[address] = (i, entry)
+    if conflicts and on_conflict == "error":
+        raise ValueError(
+            "resources in more than one state:\n{}".format("\n".join(conflicts))
+        )
+    versions = [
+        _[0]["terraform_version"] for _ in scans if _[0].get("terraform_version")
+    ]
+    header = dict(
+        version=4,
+        terraform_version=max(versions, key=_version_key, default="0.12.24"),
+        serial=1,
+        lineage=str(uuid4()),
+        outputs=dict(),
+    )
+    # resources of each state are copied in the order of the state, to seek forward
+    by_state = dict()
+    for i, entry in chosen.values():
+        by_state.setdefault(i, []).append(entry)
+    with atomic_write(out_file, "wb") as dst:
+        dst.write(json.dumps(header)[:-1].encode())
+        dst.write(b', "resources": [\n')
+        count = 0
+        for i in sorted(by_state):
+            with open(state_files[i], "rb") as src:
+                for entry in by_state[i]:
+                    dst.write(b",\n" if count else b"")
+                    src.seek(entry["start"])
+                    dst.write(src.read(entry["end"] - entry["start"]))
+                    count += 1
+        dst.write(b"\n]}\n")
+    return count, conflicts
+
+
+def instance_address(address, instance: dict):
+    """address of an instance of a v4 resource, such as `aws_vpc.main[0]` or
+    `aws_vpc.main["a"]` of a resource with count or for_each
+    """
+    if "index_key" not in instance:
+        return address
+    return "{}[{}]".format(address, json.dumps(instance["index_key"]))
+
+
+def diff_attributes(_type, before: dict, after: dict, ignore=None):
+    """changed attributes of an instance
+
+    :param _type: resource type of the instance
+    :param ignore: function of (type, key, value) whether to ignore an attribute
+    :return: list of dict of name, before and after value of changed attributes
+    """
+    changes = []
+    for key in sorted(set(before) | set(after)):
+        old, new = before.get(key), after.get(key)
+        if old == new:
+            continue
+        if ignore and ignore(_type, key, old if new is None else new):
+            continue
+        changes.append(dict(name=key, before=old, after=new))
+    return changes
+
+
+def _attributes(instance):
+    return instance.get("attributes") or instance.get("attributes_flat") or dict()
+
+
+def _hash(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+def _instances(address, res):
+    return OrderedDict((instance_address(address, _), _) for _ in res["instances"])
+
+
+def diff_states(file_a, file_b, ignore=None):
+    """structural diff of two v4 state files by resource address. Resources of
+    the same text, then instances of the same attributes by hash, are skipped
+    without being compared attribute by attribute, and only resources changed
+    are decoded again.
+
+    :param file_a: path of the state before
+    :param file_b: path of the state after
+    :param ignore: function of (type, key, value) whether to ignore an attribute
+    :return: dict of added and removed instance addresses, and changed ones as
+        dict of address, type and attributes as returned by `diff_attributes`
+    :raise ValueError: if a state is not v4
+    """
+    scans = []
+    for state_file in [file_a, file_b]:
+        meta, entries = scan_file(state_file)
+        if meta.get("version", 3) < 4:
+            raise ValueError("{} is not a v4 state".format(state_file))
+        scans.append(OrderedDict((_["address"], _) for _ in entries))
+    before, after = scans
+    report = dict(
+        added=[_ for _ in after if _ not in before],
+        removed=[_ for _ in before if _ not in after],
+        changed=[],
+    )
+    with open(file_a, "rb") as fa, open(file_b, "rb") as fb:
+
+        def read(fd, entry):
+            fd.seek(entry["start"])
+            return json.loads(fd.read(entry["end"] - entry["start"]).decode("utf8"))
+
+        for address, entry in before.items():
+            other = after.get(address)
+            if other is None or entry["digest"] == other["digest"]:
+                continue
+            old, new = read(fa, entry), read(fb, other)
+            old_instances = _instances(address, old)
+            new_instances = _instances(address, new)
+            report["added"].extend(_ for _ in new_instances if _ not in old_instances)
+            for key, instance in old_instances.items():
+                if key not in new_instances:
+                    report["removed"].append(key)
+                    continue
+                old_attrs = _attributes(instance)
+                new_attrs = _attributes(new_instances[key])
+                if _hash(old_attrs) == _hash(new_attrs):
+                    continue
+                changes = diff_attributes(new["type"], old_attrs, new_attrs, ignore)
+                if changes:
+                    report["changed"].append(
+                        dict(address=key, type=new["type"], attributes=changes)
+                    )
+    report["added"].sort()
+    report["removed"].sort()
+    return report
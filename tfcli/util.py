@@ -1,16 +1,47 @@
+import json
+import logging
 import subprocess
+from functools import lru_cache
 
+from .runner import run
 
-def run_cmd(cmd: list, logger=None, cwd=None, show_stdout=False):
-    proc = subprocess.Popen(
-        cmd, stderr=subprocess.PIPE, stdout=subprocess.PIPE, cwd=cwd
+
+def run_cmd(
+    cmd: list, logger=None, cwd=None, show_stdout=False, errors=None, timeout=None
+):
+    """run a command and return its exit code, its output is streamed to the
+    logger, and the last lines of it are logged again as error if it fails
+
+    :param show_stdout: whether to log stdout as info instead of debug
+    :param errors: list to append stderr of the command to, if given
+    :param timeout: seconds to wait for the command before killing it, default to
+        `runner.DEFAULT_TIMEOUT`
+    """
+    result = run(
+        cmd,
+        logger,
+        cwd,
+        timeout=timeout,
+        log_level=logging.INFO if show_stdout else logging.DEBUG,
     )
-    if logger:
-        logger.info("running: {}".format(" ".join(cmd)))
-    o, e = proc.communicate()
-    if proc.returncode != 0 and logger:
-        logger.error(o.decode())
-        logger.error(e.decode())
-    if proc.returncode == 0 and show_stdout:
-        logger.info(o.decode())
-    return proc.returncode
+    if errors is not None:
+        errors.append("\n".join(result.stderr))
+    if result.returncode != 0 and logger:
+        logger.error("\n".join(result.stdout))
+        logger.error("\n".join(result.stderr))
+    return result.returncode
+
+
+@lru_cache()
+def terraform_version():
+    """version of terraform command as tuple of int, None if it is unknown"""
+    try:
+        proc = subprocess.run(
+            ["terraform", "version", "-json"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        version = json.loads(proc.stdout.decode())["terraform_version"]
+    except (OSError, ValueError, KeyError):
+        return None
+    return tuple(int(_) for _ in version.split("-")[0].split("."))
@@ -0,0 +1,194 @@
+import time
+from collections import Counter
+from os import path, remove, walk
+
+from .resources.manifest import touched_addresses
+from .runner import run_all
+from .state import iter_json_array
+
+PLAN_FILE = "tfcli-verify.tfplan"
+SHOW_FILE = "tfcli-verify.json"
+
+
+def plan_dirs(output):
+    """directories of synced resources under `output`, which have both
+    configuration and state
+    """
+    for current, dirs, files in walk(output):
+        # skip .terraform, .tfcli and the like
+        dirs[:] = sorted(_ for _ in dirs if not _.startswith("."))
+        if "main.tf" in files and "terraform.tfstate" in files:
+            yield current
+
+
+def action_of(actions: list):
+    """single action name of a resource change, such as `replace` for
+    ["delete", "create"]
+    """
+    if "delete" in actions and "create" in actions:
+        return "replace"
+    return actions[0] if len(actions) == 1 else "-".join(actions)
+
+
+def drift_of(change: dict):
+    """drift summary of a resource change of `terraform show -json` plan
+
+    :return: dict of address, action, and attributes changed by an update or
+        replace, or None if the resource is not changed
+    """
+    detail = change["change"]
+    action = action_of(detail["actions"])
+    if action in ["no-op", "read"]:
+        return None
+    drift = dict(address=change["address"], type=change["type"], action=action)
+    if action in ["update", "replace"]:
+        before = detail.get("before") or dict()
+        after = detail.get("after") or dict()
+        unknown = detail.get("after_unknown") or dict()
+        drift["attributes"] = sorted(
+            k
+            for k in set(before) | set(after) | set(unknown)
+            if unknown.get(k) or before.get(k) != after.get(k)
+        )
+    return drift
+
+
+def _plan_cmd(args):
+    return [
+        "terraform",
+        "plan",
+        "-input=false",
+        "-detailed-exitcode",
+        "-out={}".format(PLAN_FILE),
+        *args,
+    ]
+
+
+def _drift_of_plan(root):
+    """drift of each changed resource of a plan shown as json in a directory"""
+    with open(path.join(root, SHOW_FILE), "rt", encoding="utf8") as fd:
+        for change in iter_json_array(fd, "resource_changes"):
+            drift = drift_of(change)
+            if drift:
+                yield drift
+
+
+def plan_all(jobs, logger=None, timeout=None, concurrency=4):
+    """plan directories, then show the plans with changes as json, each step
+    for all directories at once, by commands supervised with `runner.run_all`.
+    The json plans are written to files, as they are large for real states,
+    and parsed as a stream.
+
+    :param jobs: list of (directory, extra arguments of `terraform plan`)
+    :param logger: logger to log the commands to
+    :param timeout: seconds to wait for each command
+    :param concurrency: max number of commands to run at the same time
+    :return: list of (list of drift or the exception of a failed plan, seconds
+        spent), in the same order of jobs
+    """
+    plans = run_all(
+        [(_plan_cmd(args), root) for root, args in jobs], logger, timeout, concurrency
+    )
+    results = []
+    shown = []
+    for i, ((root, _), result) in enumerate(zip(jobs, plans)):
+        if result.returncode == 0:  # no changes
+            results.append(([], result.elapsed))
+            continue
+        if result.returncode != 2:
+            error = RuntimeError("\n".join(result.stderr[-20:]))
+            results.append((error, result.elapsed))
+            continue
+        results.append((None, result.elapsed))
+        shown.append(i)
+    shows = run_all(
+        [(["terraform", "show", "-json", PLAN_FILE], jobs[i][0]) for i in shown],
+        logger,
+        timeout,
+        concurrency,
+        stdout_file=SHOW_FILE,
+    )
+    for i, result in zip(shown, shows):
+        root = jobs[i][0]
+        elapsed = results[i][1] + result.elapsed
+        try:
+            if result.returncode != 0:
+                raise RuntimeError("fail to show plan of {}".format(root))
+            results[i] = (list(_drift_of_plan(root)), elapsed)
+        except Exception as ex:
+            results[i] = (ex, elapsed)
+    for root, _ in jobs:
+        for name in [PLAN_FILE, SHOW_FILE]:
+            if path.exists(path.join(root, name)):
+                remove(path.join(root, name))
+    return results
+
+
+def verify(output, concurrency=4, logger=None, timeout=None, fast=False):
+    """plan every synced directory under `output` concurrently, and aggregate
+    their drift into one report
+
+    :param output: output directory of sync
+    :param concurrency: max number of terraform commands to run at the same time
+    :param logger: logger to log the plan commands to
+    :param timeout: seconds to wait for each command
+    :param fast: whether to skip refreshing resources, for directories just
+        imported, whose state is as fresh as it could be. Only the resources
+        whose configuration is touched by sync are refreshed, with a second
+        plan targeting them.
+    :return: dict of summary and reports of each directory
+    """
+    started = time.time()
+    reports = [
+        dict(path=root, error=None, changes=[], elapsed=0.0)
+        for root in plan_dirs(output)
+    ]
+
+    def collect(jobs, keep):
+        """plan jobs of (report, args), and keep drift of reports by `keep`"""
+        results = plan_all(
+            [(report["path"], args) for report, args in jobs],
+            logger,
+            timeout,
+            concurrency,
+        )
+        for (report, _), (changes, elapsed) in zip(jobs, results):
+            report["elapsed"] += elapsed
+            if isinstance(changes, Exception):
+                if logger:
+                    logger.error(
+                        "fail to verify {}: {}".format(report["path"], changes)
+                    )
+                report["error"] = str(changes)
+            else:
+                report["changes"].extend(_ for _ in changes if keep(report, _))
+
+    if not fast:
+        collect([(_, []) for _ in reports], lambda report, drift: True)
+    else:
+        touched = {_["path"]: touched_addresses(_["path"]) for _ in reports}
+        collect(
+            [(_, ["-refresh=false"]) for _ in reports],
+            lambda report, drift: drift["address"] not in touched[report["path"]],
+        )
+        # dependencies of targets are planned as well
+        collect(
+            [
+                (_, ["-target={}".format(t) for t in sorted(touched[_["path"]])])
+                for _ in reports
+                if touched[_["path"]] and not _["error"]
+            ],
+            lambda report, drift: drift["address"] in touched[report["path"]],
+        )
+    counts = Counter()
+    for one in reports:
+        one["counts"] = dict(Counter(_["action"] for _ in one["changes"]))
+        counts.update(one["counts"])
+    summary = dict(
+        directories=len(reports),
+        drifted=sum(1 for _ in reports if _["changes"]),
+        errors=sum(1 for _ in reports if _["error"]),
+        elapsed=time.time() - started,
+        **counts
+    )
+    return dict(summary=summary, directories=reports)